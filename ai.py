@@ -0,0 +1,347 @@
+import random
+import threading
+import time
+
+import numpy as np
+
+from evaluate import (WIN_SCORE, evaluate_boards, next_boards,
+                      quarter_turn_boards)
+from transposition import (EXACT, LOWER_BOUND, UPPER_BOUND, canonical_hash,
+                           mirror_move)
+
+
+class SearchAborted(Exception):
+    """
+    Raised inside a search to stop it once it has run out of nodes or time,
+    or has been cancelled.
+    """
+
+
+class NegamaxBot:
+    """
+    Bot that picks its moves with a negamax search with alpha-beta pruning.
+    Every column drop and the three rotations are searched as moves.
+
+    All the positions one move away from a node are scored at once with
+    `evaluate_boards`: the scores order the moves, so the best looking
+    ones are searched first, and are the values of the leaves.
+
+    Results are kept in a `TranspositionTable`, if given one, so positions
+    reached again by other move orders (or as mirror images) are not
+    searched again, and the best move found last time is tried first.
+
+    Positions in the `OpeningBook`, if given one, aren't searched at all.
+    """
+
+    def __init__(self, depth=4, node_budget=None, table=None,
+                 time_limit=None, book=None):
+        """
+        Initialise the bot to search `depth` moves ahead, giving up on
+        deeper searches after `node_budget` positions or `time_limit`
+        seconds, if they are not None.
+        """
+        self.depth = depth
+        self.node_budget = node_budget
+        self.time_limit = time_limit
+        self.table = table
+        self.book = book
+
+        # when the current search has to stop by, and an event that stops it
+        # early when set
+        self.stop_time = None
+        self.stop_event = None
+
+        # statistics from the last search
+        self.nodes = 0
+        self.depth_reached = 0
+
+    def best_move(self, game_state, stop_event=None):
+        """
+        Returns the best move found for the current player in `game_state`,
+        which is left unchanged.
+
+        Searches one move ahead, then two, and so on up to `depth` moves,
+        trying the best move of each search first in the next one. If the
+        node budget or time runs out, or `stop_event` is set, the best move
+        of the last finished search is returned.
+        """
+        self.nodes = 0
+        self.depth_reached = 0
+
+        if self.book is not None:
+            move = self.book.lookup(game_state)
+            if move is not None and move in game_state.legal_moves():
+                return move
+
+        state = game_state.copy()
+        self.stop_event = stop_event
+        if self.time_limit is None:
+            self.stop_time = None
+        else:
+            self.stop_time = time.perf_counter() + self.time_limit
+        if self.table is not None:
+            self.table.new_search()
+
+        moves = self.ordered_moves(state)
+        if not moves:
+            # the game is over, there is nothing to play
+            return None
+
+        # if not even a one move search finishes, go with the best looking
+        best_move = moves[0]
+        for depth in range(1, self.depth + 1):
+            try:
+                score, move = self.search_root(state, depth, best_move)
+            except SearchAborted:
+                break
+
+            best_move = move
+            self.depth_reached = depth
+
+            # nothing to gain from looking further once the result is known
+            if abs(score) >= WIN_SCORE:
+                break
+
+        return best_move
+
+    def search_root(self, state, depth, first_move=None):
+        """
+        Searches `depth` moves ahead from `state`, trying `first_move`
+        before any other. Returns the best score and move.
+        """
+        moves = self.ordered_moves(state)
+        if first_move in moves:
+            moves.remove(first_move)
+            moves.insert(0, first_move)
+
+        alpha = -np.inf
+        best_score = -np.inf
+        best_move = moves[0]
+        for move in moves:
+            score = self.score_move(state, move, depth, alpha, np.inf)
+            if score > best_score:
+                best_score = score
+                best_move = move
+            alpha = max(alpha, score)
+
+        return best_score, best_move
+
+    def ordered_moves(self, state):
+        """Returns the moves in `state`, best looking first."""
+        if state.is_over():
+            return []
+        moves, _, scores = self.score_next_boards(state)
+        return [moves[i] for i in np.argsort(-scores, kind='stable')]
+
+    def score_next_boards(self, state):
+        """
+        Returns a tuple (moves, won, scores) for every move in `state`, as
+        `score_boards` scores the boards they lead to. The quarter turns of
+        a board that isn't square are a different shape, so they are scored
+        on their own.
+        """
+        moves, grids = next_boards(state.grid, state.player)
+        won, scores = self.score_boards(state, grids)
+
+        turn_moves, turned = quarter_turn_boards(state.grid)
+        if turn_moves:
+            turn_won, turn_scores = self.score_boards(state, turned)
+            moves = moves + turn_moves
+            won = np.concatenate((won, turn_won))
+            scores = np.concatenate((scores, turn_scores))
+        return moves, won, scores
+
+    def score_boards(self, state, grids):
+        """
+        Scores the positions in `grids`, each one move away from `state`,
+        for the player to move in `state`. Returns the (wins, scores) of
+        `evaluate_boards`, except that a board with any line counts as a
+        win for the player that moved.
+        """
+        wins, scores = evaluate_boards(
+            grids, state.connect_num, state.player)
+        won = wins.any(axis=1)
+        return won, np.where(won, WIN_SCORE, scores)
+
+    def score_move(self, state, move, depth, alpha, beta):
+        """
+        Returns the score of playing `move` in `state`, for the player
+        making it, searching `depth - 1` more moves ahead.
+        """
+        state.play(move)
+        try:
+            if state.winner is not None:
+                score = WIN_SCORE + depth
+            elif state.bitboard.is_full():
+                score = 0
+            else:
+                score = -self.search(state, depth - 1, -beta, -alpha)
+        finally:
+            state.undo()
+        return score
+
+    def search(self, state, depth, alpha, beta):
+        """
+        Returns the score of `state` for the player to move, searching
+        `depth` moves ahead, with alpha-beta bounds `alpha` and `beta`.
+        At depth 0 the heuristic scores of the next moves are used.
+        """
+        self.nodes += 1
+        if self.node_budget is not None and self.nodes > self.node_budget:
+            raise SearchAborted
+        if self.stop_time is not None and time.perf_counter() > self.stop_time:
+            raise SearchAborted
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchAborted
+
+        if state.bitboard.is_full():
+            return 0
+
+        # look for an earlier result for this position or its mirror image
+        alpha_start = alpha
+        table_move = None
+        if self.table is not None:
+            key, mirrored = canonical_hash(state.grid, state.player)
+            entry = self.table.probe(key)
+            if entry is not None:
+                entry_depth, score, flag, table_move = entry
+                if mirrored:
+                    table_move = mirror_move(table_move, state.n_cols)
+
+                if entry_depth >= depth:
+                    if flag == EXACT:
+                        return score
+                    elif flag == LOWER_BOUND:
+                        alpha = max(alpha, score)
+                    else:
+                        beta = min(beta, score)
+                    if alpha >= beta:
+                        return score
+
+        moves, won, scores = self.score_next_boards(state)
+        order = list(np.argsort(-scores, kind='stable'))
+
+        # winning straight away is the best there is, sooner is better
+        # (these don't depend on alpha and beta, so they are exact)
+        if won.any():
+            best_score = WIN_SCORE + depth
+            best_move = moves[order[0]]
+            flag = EXACT
+        elif depth == 0:
+            best_score = scores[order[0]]
+            best_move = moves[order[0]]
+            flag = EXACT
+        else:
+            if table_move in moves:
+                order.remove(moves.index(table_move))
+                order.insert(0, moves.index(table_move))
+
+            best_score = -np.inf
+            best_move = None
+            for i in order:
+                score = self.score_move(state, moves[i], depth, alpha, beta)
+                if score > best_score:
+                    best_score = score
+                    best_move = moves[i]
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    break
+
+            if best_score <= alpha_start:
+                flag = UPPER_BOUND
+            elif best_score >= beta:
+                flag = LOWER_BOUND
+            else:
+                flag = EXACT
+
+        if self.table is not None:
+            if mirrored:
+                best_move = mirror_move(best_move, state.n_cols)
+            self.table.store(key, depth, best_score, flag, best_move)
+
+        return best_score
+
+
+class BotWorker:
+    """
+    Runs a bot's search in a background thread, so the game loop can keep
+    drawing and handling events while the bot thinks. Start a search with
+    `start()`, then check `done()` every frame until `result()` is ready.
+    An error in the search is raised again by `result()`, in the thread
+    that asks for it.
+    """
+
+    def __init__(self, bot):
+        """Initialise the worker for `bot`, which needs a `best_move`."""
+        self.bot = bot
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.move = None
+        self.error = None
+
+    def start(self, game_state):
+        """Starts searching for the best move in `game_state`."""
+        self.cancel()
+        self.stop_event = threading.Event()
+        self.move = None
+        self.error = None
+
+        # the search gets its own copy, so the game can carry on
+        state = game_state.copy()
+        self.thread = threading.Thread(
+            target=self.search, args=(state, self.stop_event), daemon=True)
+        self.thread.start()
+
+    def search(self, state, stop_event):
+        """Runs in the worker thread: finds and keeps the best move."""
+        try:
+            move = self.bot.best_move(state, stop_event)
+        except Exception as error:
+            # kept for `result`, rather than lost with the thread
+            self.error = error
+            return
+        if not stop_event.is_set():
+            self.move = move
+
+    def is_busy(self):
+        """Returns true if a search has been started and not collected."""
+        return self.thread is not None
+
+    def done(self):
+        """Returns true if the started search has finished."""
+        return self.thread is not None and not self.thread.is_alive()
+
+    def result(self):
+        """
+        Returns the move found by the finished search, and collects it.
+        Raises the error the search stopped with, if it had one.
+        """
+        self.thread.join()
+        self.thread = None
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        return self.move
+
+    def cancel(self):
+        """Stops any search that is running, and throws its result away."""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+
+class RandomBot:
+    """
+    Bot that drops its coins in random columns, like the 'ai_easy' bot in
+    `Game.call_bot`: it never rotates the board.
+    """
+
+    def __init__(self, seed=None):
+        """Initialise the bot's random number generator with `seed`."""
+        self.random = random.Random(seed)
+
+    def best_move(self, game_state):
+        """Returns a random column that isn't full in `game_state`."""
+        return self.random.choice([move for move in game_state.legal_moves()
+                                   if move >= 0])
@@ -0,0 +1,215 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+# the most memory scaled images may take up before the least recently used
+# ones are dropped, in bytes
+SCALED_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class AssetCache:
+    """
+    Class keeping every image the game uses, so each file is only read and
+    decoded once. Images are converted to the display's pixel format (once
+    there is a display), which makes blitting them much faster, and scaled
+    copies are kept too, least recently used ones first out. Images can be
+    decoded and scaled ahead of time in background threads with `preload`.
+    """
+
+    def __init__(self, max_bytes=SCALED_CACHE_BYTES):
+        """Initialise an empty cache keeping `max_bytes` of scaled images."""
+        self.max_bytes = max_bytes
+
+        # decoded images by path, and the paths (or, for images scaled in
+        # the background, the (path, size) keys) converted for the display
+        self.images = {}
+        self.converted = set()
+
+        # images being decoded in the background, as futures by path, and
+        # being scaled, as futures by (path, size)
+        self.pending = {}
+        self.pending_scaled = {}
+
+        # scaled images by (path, size), most recently used last
+        self.scaled = OrderedDict()
+        self.scaled_bytes = 0
+
+        self.loads = 0
+        self.hits = 0
+        self.misses = 0
+
+    def image(self, path):
+        """Returns the image at `path`, at its original size."""
+        surface = self.images.get(path)
+        if surface is None:
+            future = self.pending.pop(path, None)
+            if future is not None:
+                # wait for the background thread, rather than decode twice
+                surface = future.result()
+            else:
+                surface = pygame.image.load(path)
+            self.loads += 1
+
+        if (path not in self.converted and
+                pygame.display.get_surface() is not None):
+            surface = convert(surface)
+            self.converted.add(path)
+
+            # scaled copies of the unconverted image would be slow to blit
+            for key in [key for key in self.scaled
+                        if key[0] == path and key not in self.converted]:
+                self.scaled_bytes -= surface_bytes(self.scaled.pop(key))
+
+        self.images[path] = surface
+        return surface
+
+    def scaled_image(self, path, size):
+        """Returns the image at `path`, scaled to `size` (width, height)."""
+        key = (path, (int(size[0]), int(size[1])))
+        surface = self.scaled.get(key)
+        if surface is not None and (
+                path in self.converted or key in self.converted):
+            self.scaled.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        self.converted.discard(key)
+        future = self.pending_scaled.pop(key, None)
+        if future is not None:
+            # scaled in the background, so only the scaled copy needs
+            # converting, not the (often much bigger) original
+            surface = future.result()
+            if pygame.display.get_surface() is not None:
+                surface = convert(surface)
+                self.converted.add(key)
+        else:
+            surface = pygame.transform.scale(self.image(path), key[1])
+        if key in self.scaled:
+            self.scaled_bytes -= surface_bytes(self.scaled.pop(key))
+        self.scaled[key] = surface
+        self.scaled_bytes += surface_bytes(surface)
+
+        # drop the least recently used, but always keep the newest
+        while self.scaled_bytes > self.max_bytes and len(self.scaled) > 1:
+            old_key, old_surface = self.scaled.popitem(last=False)
+            self.scaled_bytes -= surface_bytes(old_surface)
+            self.converted.discard(old_key)
+
+        return surface
+
+    def preload(self, images, workers=None):
+        """
+        Start decoding the images in `images`, a list of (path, size)
+        pairs, in a pool of `workers` threads (None for one per core), in
+        that order, and return straight away. Images with a size are scaled
+        to it too, and a None size keeps the original. They are converted
+        for the display when first used.
+        """
+        images = [(path, None if size is None else
+                   (int(size[0]), int(size[1]))) for path, size in images]
+        paths = [path for path, _ in images
+                 if path not in self.images and path not in self.pending]
+        sizes = [(path, size) for path, size in images
+                 if size is not None and (path, size) not in self.scaled and
+                 (path, size) not in self.pending_scaled]
+        if not paths and not sizes:
+            return
+
+        # the threads finish decoding and scaling, then exit, without being
+        # waited for; every image is queued before anything scaling it, so
+        # a thread never waits on a decode that no thread has started
+        executor = ThreadPoolExecutor(max_workers=workers)
+        decoded = {}
+        for path in dict.fromkeys(paths):
+            decoded[path] = self.pending[path] = executor.submit(
+                pygame.image.load, path)
+        for key in dict.fromkeys(sizes):
+            path, size = key
+            source = decoded.get(path) or self.pending.get(path)
+            if source is None:
+                # already decoded, so scale what is cached
+                image = self.images[path]
+                self.pending_scaled[key] = executor.submit(
+                    pygame.transform.scale, image, size)
+            else:
+                self.pending_scaled[key] = executor.submit(
+                    scale_when_decoded, source, size)
+        executor.shutdown(wait=False)
+
+    def clear(self):
+        """Remove every image and reset the statistics."""
+        self.images.clear()
+        self.pending.clear()
+        self.pending_scaled.clear()
+        self.converted.clear()
+        self.scaled.clear()
+        self.scaled_bytes = 0
+        self.loads = self.hits = self.misses = 0
+
+    def stats(self):
+        """Returns a dictionary of statistics for sizing the cache."""
+        return {
+            "images": len(self.images),
+            "loads": self.loads,
+            "scaled": len(self.scaled),
+            "scaled_bytes": self.scaled_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# the cache shared by the whole game
+_cache = AssetCache()
+
+
+# functions that are less closely tied to cache objects go below
+
+
+def asset_cache():
+    """Returns the cache shared by the whole game."""
+    return _cache
+
+
+def load_image(path):
+    """Returns the image at `path` from the shared cache."""
+    return _cache.image(path)
+
+
+def scaled_image(path, size):
+    """Returns the image at `path` scaled to `size` from the shared cache."""
+    return _cache.scaled_image(path, size)
+
+
+def preload_images(images, workers=None):
+    """
+    Starts decoding and scaling the (path, size) pairs in `images` into the
+    shared cache.
+    """
+    _cache.preload(images, workers)
+
+
+def scale_when_decoded(future, size):
+    """Returns the image `future` decodes, scaled to `size`."""
+    return pygame.transform.scale(future.result(), size)
+
+
+def convert(surface):
+    """
+    Returns `surface` in the display's pixel format, keeping its alpha
+    channel only if some of it is see-through.
+    """
+    if surface.get_flags() & pygame.SRCALPHA:
+        alpha = pygame.surfarray.pixels_alpha(surface)
+        transparent = bool((alpha < 255).any())
+        del alpha
+        if transparent:
+            return surface.convert_alpha()
+    return surface.convert()
+
+
+def surface_bytes(surface):
+    """Returns roughly how much memory the pixels of `surface` take up."""
+    width, height = surface.get_size()
+    return width * height * surface.get_bytesize()
@@ -1,16 +1,17 @@
-import pygame
+
+from asset_cache import scaled_image
 
 class Background():
 
     def __init__(self, settings, screen):
-        image_game = pygame.image.load(settings.background_image_path)
-        image_main = pygame.image.load(settings.background_main_image_path)
-        image_dark = pygame.image.load(settings.background_dark_image_path)
         self.screen = screen
         self.settings = settings
-        self.image_game = pygame.transform.scale(image_game, settings.screen_size)
-        self.image_main = pygame.transform.scale(image_main, settings.screen_size)
-        self.image_dark = pygame.transform.scale(image_dark, settings.screen_size)
+        self.image_game = scaled_image(
+            settings.background_image_path, settings.screen_size)
+        self.image_main = scaled_image(
+            settings.background_main_image_path, settings.screen_size)
+        self.image_dark = scaled_image(
+            settings.background_dark_image_path, settings.screen_size)
         self.rect_main = self.image_main.get_rect()
         self.rect_game = self.image_game.get_rect()
         self.rect_dark = self.image_dark.get_rect()
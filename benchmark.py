@@ -0,0 +1,261 @@
+"""
+Benchmarks of the rules and rendering code, run without a display. For
+example:
+
+    python benchmark.py --save      (store the results as the baseline)
+    python benchmark.py             (compare against the baseline)
+
+Each benchmark is run on square boards of several sizes (up to the 99 x 99
+the settings menu allows) and for several numbers of coins to connect, on
+a board about half full of coins. Results slower than the baseline by more
+than the threshold are reported as regressions, and make the script exit
+with an error.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+# no window or sound card needed, unless one was asked for
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+from evaluate import evaluate_boards, next_boards
+from game import Game, blit_rotate, get_next_open_row
+from music import Music
+from settings import Settings
+
+BASELINE_PATH = 'benchmark_baseline.json'
+
+# a result this much slower than the baseline is a regression
+REGRESSION_THRESHOLD = 0.2
+
+DEFAULT_SIZES = [4, 7, 15, 30, 60, 99]
+DEFAULT_CONNECT_NUMS = [3, 4, 5]
+
+# the board angle used to time a rotation animation frame
+BLIT_ANGLE = 45
+
+
+def make_game(n, connect_num, seed=0):
+    """
+    Returns a sandbox `Game` on an `n` x `n` board, about half full of
+    coins, with no winner yet.
+    """
+    settings = Settings()
+    settings.set_board_size(n_rows=n, n_cols=n)
+    settings.connect_num = connect_num
+    screen = pygame.display.set_mode(settings.screen_size)
+    game = Game(settings, screen, Music(settings), pygame.time.Clock())
+
+    rng = random.Random(seed)
+    state = game.game_state
+    for _ in range(n * n // 2):
+        moves = [move for move in state.legal_moves() if move >= 0]
+        if not moves:
+            break
+        state.play(rng.choice(moves))
+        if state.winner is not None:
+            state.undo()
+    game.next_turn()
+    return game
+
+
+def time_call(function, repeat=3):
+    """Returns the fastest time one call of `function` took, in seconds."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def rules_benchmarks(game):
+    """Returns the benchmarks that depend on `connect_num`, by name."""
+    state = game.game_state
+
+    def check_win():
+        game.check_win(full_board=True)
+
+    # what a move in a real game costs: `GameState.play` only checks the
+    # lines through the coins that moved, then `undo` puts the board back
+    drops = [move for move in state.legal_moves() if move >= 0]
+    rotations = [move for move in state.legal_moves() if move < 0]
+
+    def play_drop():
+        for move in drops:
+            state.play(move)
+            state.undo()
+
+    def play_rotate():
+        for move in rotations:
+            state.play(move)
+            state.undo()
+
+    def evaluate():
+        _, grids = next_boards(state.grid, state.player)
+        evaluate_boards(grids, state.connect_num, state.player)
+
+    return {
+        "check_win": check_win,
+        "play_drop": play_drop,
+        "play_rotate": play_rotate,
+        "evaluate_boards": evaluate
+    }
+
+
+def render_benchmarks(game):
+    """Returns the benchmarks that don't depend on `connect_num`, by name."""
+    settings = game.settings
+    state = game.game_state
+    start_state = state.copy()
+
+    def next_open_rows():
+        for col in range(state.n_cols):
+            get_next_open_row(state, col)
+
+    def rotate_board():
+        # always rotate the same position
+        game.game_state = start_state.copy()
+        game.rotate_board(-90)
+
+    def init_board_image():
+        game.board.init_board_image()
+
+    margin_x = settings.padding_left
+    margin_y = settings.padding_top
+    rect = pygame.Rect((margin_x, margin_y), settings.board_size)
+    pos = (settings.board_size[0] / 2 + margin_x,
+           settings.board_size[1] / 2 + margin_y)
+
+    def rotate_blit():
+        sub = game.screen.subsurface(rect)
+        blit_rotate(game.screen, sub, pos, pos, BLIT_ANGLE,
+                    margin_x, margin_y)
+
+    def frame():
+        game.run_frame(1 / 120)
+
+    def turning_frame():
+        # a frame of the rotation animation, held at one angle
+        game.angle = BLIT_ANGLE
+        game.run_frame(1 / 120)
+        game.angle = 0
+
+    return {
+        "get_next_open_row": next_open_rows,
+        "rotate_board": rotate_board,
+        "init_board_image": init_board_image,
+        "blit_rotate": rotate_blit,
+        "frame": frame,
+        "turning_frame": turning_frame
+    }
+
+
+def run_benchmarks(sizes, connect_nums, log=print):
+    """
+    Runs every benchmark on every board size in `sizes`, and the rules
+    benchmarks for every number in `connect_nums` too. Returns a dictionary
+    of seconds per call, keyed by names like "check_win 7x7 k4".
+    """
+    results = {}
+    for n in sizes:
+        # some numbers of coins can't be connected on small boards
+        usable = [k for k in connect_nums if k <= n] or [n]
+        for k in usable:
+            game = make_game(n, k)
+            benchmarks = rules_benchmarks(game)
+            rules = set(benchmarks)
+            if k == usable[0]:
+                benchmarks.update(render_benchmarks(game))
+
+            for name, function in benchmarks.items():
+                if name in rules:
+                    key = f"{name} {n}x{n} k{k}"
+                else:
+                    key = f"{name} {n}x{n}"
+                results[key] = time_call(function)
+                log(f"{key:<32}{format_time(results[key]):>12}")
+
+    return results
+
+
+def format_time(seconds):
+    """Returns `seconds` as a short string in the most readable unit."""
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Prints how `results` compare to `baseline`. Returns the names of the
+    results slower than their baseline by more than `threshold`.
+    """
+    regressions = []
+    for key, seconds in results.items():
+        if key not in baseline:
+            continue
+        change = seconds / baseline[key] - 1
+        note = ""
+        if change > threshold:
+            note = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:<32}{format_time(baseline[key]):>12}"
+              f"{format_time(seconds):>12}{change:>+9.0%}{note}")
+    return regressions
+
+
+def main():
+    """Runs the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="board sizes to run on, n for an n x n board")
+    parser.add_argument('--connect', type=int, nargs='+',
+                        default=DEFAULT_CONNECT_NUMS,
+                        help="numbers of coins to connect to run on")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save', action='store_true',
+                        help="save the results as the new baseline")
+    parser.add_argument('--threshold', type=float,
+                        default=REGRESSION_THRESHOLD,
+                        help="slowdown counted as a regression, 0.2 is 20%%")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.mixer.init()
+    results = run_benchmarks(args.sizes, args.connect)
+
+    if args.save:
+        # keep the baseline of anything not run this time
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+        baseline.update(results)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(baseline, baseline_file, indent=4, sort_keys=True)
+        print(f"saved {len(results)} results to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --save to make one")
+        return
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    print()
+    print(f"{'benchmark':<32}{'baseline':>12}{'now':>12}{'change':>9}")
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regressions")
+        sys.exit(1)
+
+
+# only run main() if this python module is the one being run
+if __name__ == "__main__":
+    main()
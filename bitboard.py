@@ -0,0 +1,215 @@
+import numpy as np
+
+
+class Bitboard:
+    """
+    Class representing the coins on a board as one integer per player.
+
+    Each column takes up `n_rows + 1` bits, bottom cell first; the extra
+    bit on top of every column is always empty, so that shifting a line
+    of coins off the top of one column never wraps into the next column.
+    Bit `col * (n_rows + 1) + height` is the cell `height` coins above the
+    bottom of column `col`, which is row `n_rows - 1 - height` in the grid.
+    """
+
+    def __init__(self, n_rows, n_cols):
+        """Initialise an empty `n_rows` x `n_cols` board."""
+
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.col_height = n_rows + 1
+
+        # bits[1] and bits[2] are the coins of player 1 and 2, bits[0] unused
+        self.bits = [0, 0, 0]
+
+        # number of coins in each column, coins always sit at the bottom
+        self.heights = [0] * n_cols
+
+        # all playable cells in a single column, bottom aligned
+        self.col_mask = (1 << n_rows) - 1
+
+    def copy(self):
+        """Returns a copy of this bitboard."""
+        other = Bitboard.__new__(Bitboard)
+        other.n_rows = self.n_rows
+        other.n_cols = self.n_cols
+        other.col_height = self.col_height
+        other.bits = self.bits[:]
+        other.heights = self.heights[:]
+        other.col_mask = self.col_mask
+        return other
+
+    @classmethod
+    def from_grid(cls, grid):
+        """
+        Returns a bitboard holding the same coins as `grid`, a 2D array of
+        0, 1, 2 with row 0 at the top. Coins are assumed to already be
+        resting on top of each other.
+        """
+        n_rows, n_cols = len(grid), len(grid[0])
+        bitboard = cls(n_rows, n_cols)
+        for col in range(n_cols):
+            for row in range(n_rows - 1, -1, -1):
+                player = int(grid[row][col])
+                if player == 0:
+                    break
+                bitboard.bits[player] |= 1 << bitboard.index(row, col)
+                bitboard.heights[col] += 1
+        return bitboard
+
+    def to_grid(self):
+        """
+        Returns the board as an `n_rows` x `n_cols` int8 array of 0, 1, 2,
+        with row 0 at the top, the same layout as `Board.grid`.
+        """
+        grid = np.zeros((self.n_rows, self.n_cols), dtype=np.int8)
+        col_height = self.col_height
+        for col, height in enumerate(self.heights):
+            p1 = (self.bits[1] >> (col * col_height)) & self.col_mask
+            for h in range(height):
+                grid[self.n_rows - 1 - h][col] = 1 if (p1 >> h) & 1 else 2
+        return grid
+
+    def index(self, row, col):
+        """Returns the bit index of the cell at grid position (row, col)."""
+        return col * self.col_height + (self.n_rows - 1 - row)
+
+    def occupied(self):
+        """Returns the bits of every coin on the board."""
+        return self.bits[1] | self.bits[2]
+
+    def can_drop(self, col):
+        """Returns true if column `col` is on the board and not full."""
+        return 0 <= col < self.n_cols and self.heights[col] < self.n_rows
+
+    def is_full(self):
+        """Returns true if every column is full."""
+        return all(height == self.n_rows for height in self.heights)
+
+    def next_open_row(self, col):
+        """
+        Returns the grid row a coin dropped in column `col` would land on,
+        or None if that column is full.
+        """
+        height = self.heights[col]
+        if height == self.n_rows:
+            return None
+        return self.n_rows - 1 - height
+
+    def drop(self, col, player):
+        """
+        Drops a coin of `player` into column `col`. Returns the grid row it
+        landed on, or None (and does nothing) if the column is full.
+        """
+        row = self.next_open_row(col)
+        if row is None:
+            return None
+        self.bits[player] |= 1 << (col * self.col_height + self.heights[col])
+        self.heights[col] += 1
+        return row
+
+    def undrop(self, col):
+        """Removes the top coin of column `col`, the reverse of `drop`."""
+        self.heights[col] -= 1
+        bit = ~(1 << (col * self.col_height + self.heights[col]))
+        self.bits[1] &= bit
+        self.bits[2] &= bit
+
+    def has_won(self, player, connect_num):
+        """Returns true if `player` has `connect_num` coins in a line."""
+        return has_line(self.bits[player], self.col_height, connect_num)
+
+    def has_connection(self, connect_num):
+        """Returns true if either player has `connect_num` coins in a line."""
+        return (self.has_won(1, connect_num) or
+                self.has_won(2, connect_num))
+
+    def rotate(self, angle):
+        """
+        Returns a new bitboard with the board rotated by `angle` degrees
+        (-90 is clockwise, 90 anticlockwise, anything else is 180), after
+        the coins have fallen down to rest again.
+        """
+        n_rows, n_cols = self.n_rows, self.n_cols
+        col_height = self.col_height
+        col_mask = self.col_mask
+        columns = [((self.bits[1] >> (col * col_height)) & col_mask,
+                    self.heights[col]) for col in range(n_cols)]
+
+        if angle == -90 or angle == 90:
+            rotated = Bitboard(n_cols, n_rows)
+            rotated_height = rotated.col_height
+
+            # each row of coins becomes a column: the bottom row becomes the
+            # leftmost column when rotating clockwise, rightmost otherwise.
+            # Clockwise, the rightmost coin in a row ends up at the bottom.
+            if angle == -90:
+                order = columns[::-1]
+            else:
+                order = columns
+
+            for height in range(n_rows):
+                p1 = 0
+                p2 = 0
+                count = 0
+                for p1_col, col_count in order:
+                    if col_count > height:
+                        if (p1_col >> height) & 1:
+                            p1 |= 1 << count
+                        else:
+                            p2 |= 1 << count
+                        count += 1
+
+                if angle == -90:
+                    new_col = height
+                else:
+                    new_col = n_rows - 1 - height
+
+                shift = new_col * rotated_height
+                rotated.bits[1] |= p1 << shift
+                rotated.bits[2] |= p2 << shift
+                rotated.heights[new_col] = count
+        else:
+            rotated = Bitboard(n_rows, n_cols)
+
+            # columns swap sides and every column is turned upside down, so
+            # the top coin of a column becomes the bottom coin
+            for col, (p1_col, count) in enumerate(columns):
+                p1 = reverse_bits(p1_col, count)
+                p2 = reverse_bits(p1_col ^ ((1 << count) - 1), count)
+                shift = (n_cols - 1 - col) * col_height
+                rotated.bits[1] |= p1 << shift
+                rotated.bits[2] |= p2 << shift
+                rotated.heights[n_cols - 1 - col] = count
+
+        return rotated
+
+
+# functions that are less closely tied to bitboard objects go below
+
+
+def has_line(bits, col_height, connect_num):
+    """
+    Returns true if `bits`, laid out as in `Bitboard`, has `connect_num`
+    set bits in a line horizontally, vertically or diagonally.
+    """
+    # vertical, horizontal, and the two diagonals
+    for step in (1, col_height, col_height + 1, col_height - 1):
+        # runs[i] is set if a line of `length` starts at bit i; extending
+        # by at most `length` each time means O(log connect_num) shifts
+        runs = bits
+        length = 1
+        while length < connect_num and runs:
+            extend = min(length, connect_num - length)
+            runs &= runs >> (step * extend)
+            length += extend
+        if runs:
+            return True
+    return False
+
+
+def reverse_bits(bits, count):
+    """Returns the lowest `count` bits of `bits` in reverse order."""
+    if count == 0:
+        return 0
+    return int(format(bits, f'0{count}b')[::-1], 2)
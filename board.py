@@ -1,5 +1,6 @@
 import pygame
-import numpy as np
+
+from asset_cache import scaled_image
 
 
 class Board:
@@ -16,10 +17,6 @@ class Board:
         self.n_cols = settings.n_cols
         self.cell_length = settings.cell_size[0]
 
-        # grid is a 2D list with 0, 1, 2:
-        # representing empty, player 1 and player 2 respectively
-        self.grid = np.zeros((settings.n_rows, settings.n_cols))
-
         # rects is a 2D list of Rects representing tiles on the board.
         self.rects = self.init_rect_grid()
 
@@ -27,13 +24,11 @@ class Board:
             (self.settings.padding_left, self.settings.padding_top),
             settings.board_size)
 
-        # load tile images, scaled to cell_size
-        self.dark_tile_image = pygame.transform.scale(
-            pygame.image.load(settings.tile_image_paths["dark"]),
-            settings.cell_size)
-        self.light_tile_image = pygame.transform.scale(
-            pygame.image.load(settings.tile_image_paths["light"]),
-            settings.cell_size)
+        # tile images, scaled to cell_size
+        self.dark_tile_image = scaled_image(
+            settings.tile_image_paths["dark"], settings.cell_size)
+        self.light_tile_image = scaled_image(
+            settings.tile_image_paths["light"], settings.cell_size)
 
         self.image = self.init_board_image()
 
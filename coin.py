@@ -1,49 +1,141 @@
+import numpy as np
 import pygame
 
+from asset_cache import scaled_image
 
-class Coin(pygame.sprite.Sprite):
-    """Class representing a coin in the game."""
 
-    def __init__(self, settings, screen, state, start_pos, end_pos, music):
-        """Initialise the coin and set its starting and ending position."""
+class Coins:
+    """
+    Class representing every coin in play. Coins aren't sprites: their
+    positions are kept in arrays, so all the falling coins are moved in
+    one step, and all the coins are drawn in one call. Coins are drawn in
+    between where they were before and after the last step.
+    """
 
-        # construct the parent pygame.Sprite of this Coin
-        super().__init__()
+    def __init__(self, settings, screen):
+        """Initialise an empty set of coins, with images for each player."""
 
-        # each Coin owns a reference to screen
+        # Coins owns a reference to screen
         self.screen = screen
 
-        self.music = music
-        # load the coin image, and set its rect attribute
-        image = pygame.image.load(settings.coin_image_paths[state])
-        self.image = pygame.transform.scale(image, settings.cell_size)
-        self.rect = self.image.get_rect()
+        # coin images, scaled to cell_size, by player
+        self.images = {player: scaled_image(path, settings.cell_size)
+                       for player, path in settings.coin_image_paths.items()}
+        self.length = settings.coin_length
 
-        # start each new coin at the position given as input
-        # each coin has a predefined destination: end_pos
-        self.rect.centery, self.rect.centerx = start_pos
-        self.end_pos = end_pos
+        # falling coins start at `start_speed` and speed up by `gravity`,
+        # in pixels per second (per second)
+        self.start_speed = settings.coin_start_speed
+        self.gravity = settings.coin_gravity
 
-        # coin starts off falling, constant speed
-        self.is_falling = True
-        self.fall_speed = settings.coin_fall_speed
+        # one entry per coin: its player, the centre of its image (and its
+        # height before the last step), how fast it falls, where it stops,
+        # and whether it is still falling
+        self.players = np.zeros(0, dtype=np.int8)
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.prev_y = np.zeros(0)
+        self.speed = np.zeros(0)
+        self.end_y = np.zeros(0)
+        self.falling = np.zeros(0, dtype=bool)
+        self.n_falling = 0
 
-    def draw(self):
-        """Draw the coin at its current position."""
+        # indices of the coins moved by the last step
+        self.stepped = np.zeros(0, dtype=int)
 
-        self.screen.blit(self.image, self.rect)
+        # each coin's image, in the same order, ready to be drawn
+        self.coin_images = []
 
-    def is_done_falling(self):
-        """Return true if coin is at its ending position."""
+    def __len__(self):
+        return len(self.players)
 
-        return self.rect.centery >= self.end_pos[0]
+    def add(self, players, start_positions, end_positions):
+        """
+        Add coins of `players` that fall from `start_positions` to
+        `end_positions`, given as (y, x) screen positions of their centres.
+        """
+        start_positions = np.asarray(start_positions, dtype=float)
+        end_positions = np.asarray(end_positions, dtype=float)
+        n_coins = len(players)
 
-    def update(self):
-        """Update this coin's position."""
+        self.players = np.concatenate((self.players, players))
+        self.y = np.concatenate((self.y, start_positions[:, 0]))
+        self.prev_y = np.concatenate((self.prev_y, start_positions[:, 0]))
+        self.x = np.concatenate((self.x, start_positions[:, 1]))
+        self.end_y = np.concatenate((self.end_y, end_positions[:, 0]))
+        self.speed = np.concatenate(
+            (self.speed, np.full(n_coins, float(self.start_speed))))
+        self.falling = np.concatenate(
+            (self.falling, np.ones(n_coins, dtype=bool)))
+        self.n_falling += n_coins
 
-        if self.is_falling:
-            if self.is_done_falling():
-                self.music.play('coin_drop')
-                self.is_falling = False
-            else:
-                self.rect.y += (self.fall_speed)
+        self.coin_images.extend(self.images[player] for player in players)
+
+    def is_falling(self):
+        """Returns true if any coin hasn't landed yet."""
+        return self.n_falling > 0
+
+    def update(self, time_delta):
+        """
+        Move every falling coin on by `time_delta` seconds. Returns the
+        number of coins that landed.
+        """
+        # coins moved by the previous step have finished moving
+        self.prev_y[self.stepped] = self.y[self.stepped]
+        if not self.n_falling:
+            self.stepped = self.stepped[:0]
+            return 0
+
+        index = np.flatnonzero(self.falling)
+        self.stepped = index
+        old_y = self.y[index]
+        end_y = self.end_y[index]
+
+        speed = self.speed[index] + self.gravity * time_delta
+        y = np.minimum(old_y + speed * time_delta, end_y)
+        landed = y >= end_y
+
+        self.speed[index] = speed
+        self.y[index] = y
+        self.falling[index[landed]] = False
+        n_landed = int(np.count_nonzero(landed))
+        self.n_falling -= n_landed
+        return n_landed
+
+    def moving_rect(self):
+        """
+        Returns a `Rect` around everywhere the coins still falling or moved
+        by the last step can be drawn, or None if there are none.
+        """
+        moving = self.falling.copy()
+        moving[self.stepped] = True
+        if not moving.any():
+            return None
+
+        x = self.x[moving]
+        half = self.length // 2
+        left = int(x.min()) - half
+        top = int(self.prev_y[moving].min()) - half
+        return pygame.Rect(left, top,
+                           int(x.max()) - half - left + self.length,
+                           int(self.y[moving].max()) - half - top +
+                           self.length)
+
+    def draw(self, surface=None, offset=(0, 0), interpolation=1.0):
+        """
+        Draw every coin on `surface` (the screen if None), moved by
+        `offset`, `interpolation` of the way (0 to 1) from where it was
+        before the last step to where it is now.
+        """
+        if not len(self.players):
+            return
+        if surface is None:
+            surface = self.screen
+
+        y = self.prev_y + (self.y - self.prev_y) * interpolation
+        half = self.length // 2
+        left = (self.x - half + offset[0]).astype(int)
+        top = (y - half + offset[1]).astype(int)
+        surface.blits(zip(self.coin_images,
+                          np.column_stack((left, top)).tolist()),
+                      doreturn=False)
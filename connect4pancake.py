@@ -1,9 +1,12 @@
+import time
+
+# when the game was started, for timing how long it takes to show up
+START_TIME = time.perf_counter()
+
 import pygame
 
+from asset_cache import preload_images
 from settings import Settings
-from game import Game
-from music import Music
-from menu import Menu
 
 def run():
     """Main game function."""
@@ -15,18 +18,30 @@ def run():
     screen = pygame.display.set_mode(settings.screen_size)
     pygame.display.set_caption("Connect 4 Pancake")
 
+    # show something straight away, rather than a black window
+    screen.fill(settings.bg_color)
+    pygame.display.flip()
+    pygame.event.pump()
+    print(f"first frame after {time.perf_counter() - START_TIME:.3f} s.")
+
+    # decode and scale the images in the background, while the rest of
+    # the game (and pygame_gui) is imported
+    preload_images(settings.image_sizes())
+
+    from game import Game
+    from menu import Menu
+    from music import Music
+
     clock = pygame.time.Clock()
     music = Music(settings)
     pygame.mixer.init()
 
-    # update screen size to reflect new settings (if modified at all)
-    screen = pygame.display.set_mode(settings.screen_size)
+    menu = Menu(settings, screen, clock)
+    print(f"menu ready after {time.perf_counter() - START_TIME:.3f} s.")
 
     # main game loop
     while True:
-        # create the main menu and run the menu event loop
-        # retrieve the picked game_mode
-        menu = Menu(settings, screen, clock)
+        # run the main menu event loop, retrieve the picked game_mode
         game_mode = menu.show(music)
 
         # update screen size to reflect new settings (if modified at all)
@@ -35,6 +50,9 @@ def run():
         game = Game(settings, screen, music, clock, game_mode)
         game.run()
 
+        # create a new main menu, for the screen as it is after the game
+        menu = Menu(settings, screen, clock)
+
 
 # only run() if this python module is the one being run (not when imported)
 if __name__ == "__main__":
@@ -0,0 +1,155 @@
+import numpy as np
+
+from bitboard import Bitboard
+from gamestate import ROTATION_ANGLES, ROTATIONS
+from rules import DIRECTIONS, shift
+
+# score given to a position that has been won, larger than any heuristic
+WIN_SCORE = 1e9
+
+# heuristic scores are scaled down, on boards big enough to need it, so
+# they stay within this: the search takes any score of at least
+# `WIN_SCORE` to be a win
+MAX_HEURISTIC = WIN_SCORE / 2
+
+# how much each coin in the centre column (either of the middle two, on a
+# board with an even number of columns) is worth: it is part of the most
+# possible lines. Both middle columns count the same, so a board and its
+# mirror image score the same, as the transposition table assumes
+CENTER_WEIGHT = 1.0
+
+
+def evaluate_boards(grids, connect_num, player):
+    """
+    Scores a stack of boards all at once, from the point of view of
+    `player`. `grids` is an (N, n_rows, n_cols) array of 0, 1, 2, laid out
+    the same way as `Board.grid`.
+
+    Returns a tuple (wins, scores): `wins` is an (N, 2) boolean array,
+    where `wins[i, p - 1]` is true if player p has a line in board i, and
+    `scores` is an (N,) float array of heuristic scores: +-`WIN_SCORE` for
+    won and lost boards, otherwise the value of every line of
+    `connect_num` cells that only one player has coins in, scaled down if
+    it could get past `MAX_HEURISTIC` on boards of this size.
+    """
+    grids = np.asarray(grids, dtype=np.int8)
+    opponent = 3 - player
+    n_boards, n_rows, n_cols = grids.shape
+
+    mine = grids == player
+    theirs = grids == opponent
+    mine_count = mine.astype(np.int16)
+    theirs_count = theirs.astype(np.int16)
+    on_board = np.ones((n_rows, n_cols), dtype=bool)
+
+    # a line with c of one player's coins and none of the other's is worth
+    # 4 ** c, a finished line is a win
+    weights = 4.0 ** np.arange(connect_num + 1)
+    weights[0] = 0
+
+    wins = np.zeros((n_boards, 2), dtype=bool)
+    scores = np.zeros(n_boards)
+    n_lines = 0
+
+    for d_row, d_col in DIRECTIONS:
+        # lines that start at (row, col) and end on the board
+        fits = shift(on_board, (connect_num - 1) * d_row,
+                     (connect_num - 1) * d_col)
+        if not fits.any():
+            continue
+        n_lines += int(np.count_nonzero(fits))
+
+        # number of each player's coins in every line
+        mine_in_line = np.zeros(grids.shape, dtype=np.int16)
+        theirs_in_line = np.zeros(grids.shape, dtype=np.int16)
+        for i in range(connect_num):
+            mine_in_line += shift(mine, i * d_row, i * d_col)
+            theirs_in_line += shift(theirs, i * d_row, i * d_col)
+        mine_in_line *= fits
+        theirs_in_line *= fits
+
+        wins[:, player - 1] |= (mine_in_line == connect_num).any(axis=(1, 2))
+        wins[:, opponent - 1] |= (
+            theirs_in_line == connect_num).any(axis=(1, 2))
+
+        mine_open = (theirs_in_line == 0) & fits
+        theirs_open = (mine_in_line == 0) & fits
+        scores += np.where(mine_open, weights[mine_in_line], 0).sum(axis=(1, 2))
+        scores -= np.where(
+            theirs_open, weights[theirs_in_line], 0).sum(axis=(1, 2))
+
+    centre = slice((n_cols - 1) // 2, n_cols // 2 + 1)
+    scores += CENTER_WEIGHT * (mine_count[:, :, centre].sum(axis=(1, 2)) -
+                               theirs_count[:, :, centre].sum(axis=(1, 2)))
+
+    # the most a board that isn't won can score: every line one coin short
+    # of finished, and the centre full of one player's coins
+    most = (n_lines * weights[connect_num - 1] +
+            CENTER_WEIGHT * n_rows * (2 - n_cols % 2))
+    if most > MAX_HEURISTIC:
+        scores *= MAX_HEURISTIC / most
+
+    # a win for player outweighs everything, a loss comes next
+    scores = np.where(wins[:, opponent - 1], -WIN_SCORE, scores)
+    scores = np.where(wins[:, player - 1], WIN_SCORE, scores)
+    assert ((np.abs(scores) <= MAX_HEURISTIC) | wins.any(axis=1)).all()
+
+    return wins, scores
+
+
+def next_boards(grid, player, rotations=True):
+    """
+    Returns a tuple (moves, grids) of every board reachable from `grid` in
+    one move by `player`. `moves` is a list of moves as in `GameState`, and
+    `grids` is the matching (len(moves), n_rows, n_cols) int8 array that
+    `evaluate_boards` takes.
+
+    Turning the board by 90 degrees changes the shape of a board that
+    isn't square, so those two rotations are only included here for square
+    boards; `quarter_turn_boards` has them for the rest. The 180 degree
+    rotation is always included.
+    """
+    grid = np.asarray(grid, dtype=np.int8)
+    n_rows, n_cols = grid.shape
+    bitboard = Bitboard.from_grid(grid)
+
+    moves = []
+    boards = []
+    for col in range(n_cols):
+        row = bitboard.next_open_row(col)
+        if row is None:
+            continue
+        board = grid.copy()
+        board[row, col] = player
+        moves.append(col)
+        boards.append(board)
+
+    if rotations:
+        for move in ROTATIONS:
+            if n_rows != n_cols and ROTATION_ANGLES[move] != 180:
+                continue
+            moves.append(move)
+            boards.append(bitboard.rotate(ROTATION_ANGLES[move]).to_grid())
+
+    if not boards:
+        return moves, np.zeros((0, n_rows, n_cols), dtype=np.int8)
+    return moves, np.stack(boards)
+
+
+def quarter_turn_boards(grid):
+    """
+    Returns a tuple (moves, grids) of the boards reachable from `grid` by
+    turning it 90 degrees either way, if it isn't square, as an
+    (len(moves), n_cols, n_rows) int8 array. Both are empty for a square
+    board, whose quarter turns are in `next_boards`.
+    """
+    grid = np.asarray(grid, dtype=np.int8)
+    n_rows, n_cols = grid.shape
+    if n_rows == n_cols:
+        return [], np.zeros((0, n_cols, n_rows), dtype=np.int8)
+
+    bitboard = Bitboard.from_grid(grid)
+    moves = [move for move in ROTATIONS if ROTATION_ANGLES[move] != 180]
+    boards = [bitboard.rotate(ROTATION_ANGLES[move]).to_grid()
+              for move in moves]
+    return moves, np.stack(boards)
@@ -1,4 +1,3 @@
-import itertools
 import math
 import sys
 import random
@@ -9,23 +8,48 @@ import pygame
 from pygame.locals import *
 import pygame_gui
 
-from coin import Coin
+from ai import BotWorker, NegamaxBot
+from coin import Coins
 from board import Board
 from interface import Interface, GameOver
 from background import Background
+from gamestate import GameState, ROTATION_ANGLES, rotation_for_angle
+from opening_book import load_book
+from pacing import ACTIVE_SECONDS, FramePacer
+from profiler import FrameProfiler
+from record import GameRecord, write_records
+from rules import find_connections, settle
+from scheduler import Scheduler
+from transposition import TranspositionTable
 
 # mouse button constants as defined by pygame
 LEFT_MOUSE_BUTTON = 1
 RIGHT_MOUSE_BUTTON = 2
 
-# whose turn it currently is; player 1 is 1, player 2 is 2.
-GAME_STATES = itertools.cycle([1, 2])
 PLAYER_DICT = {1: "Blue", 2: "Red"}
 
+# events for the window being uncovered: pygame 2 sends WINDOWEXPOSED,
+# pygame 1 (as pinned in requirements.txt) only has VIDEOEXPOSE
+EXPOSE_EVENTS = (pygame.VIDEOEXPOSE,
+                 getattr(pygame, 'WINDOWEXPOSED', pygame.VIDEOEXPOSE))
+
+# with dirty rendering, more changed areas than this are merged into one
+MAX_DIRTY_RECTS = 16
+
+# at most this many ticks are run in one frame, however long it took
+MAX_TICKS_PER_FRAME = 10
+
+# the bot moves this many seconds into its turn, and the game ends this
+# many seconds after someone wins
+BOT_DELAY = 0.67
+END_GAME_DELAY = 0.83
+
 
 class Game:
     """
-    Class containing the game state, objects and functions that modify them.
+    Class containing the game objects and functions that modify them. The
+    rules and the coins on the board are in a `GameState`, which this
+    class plays moves on and draws.
     """
 
     def __init__(self, settings, screen, music, clock, game_mode='sandbox'):
@@ -41,8 +65,12 @@ class Game:
 
         self.music = music
         self.clock = clock
+        self.pacer = FramePacer(settings, clock)
         self.game_mode = game_mode
 
+        # loaded now so the first coin to land doesn't stall a frame
+        music.preload(['plate', 'coin_drop'])
+
         print(f"playing in game_mode: '{game_mode}'.")
 
         self.ui_manager = pygame_gui.UIManager(settings.screen_size)
@@ -50,24 +78,104 @@ class Game:
         self.ui_elements = self.interface.init_elements()
 
         # create game objects, they aren't drawn yet
-        self.coins = pygame.sprite.Group()
+        self.game_state = GameState.from_settings(settings)
+        self.coins = Coins(settings, screen)
         self.board = Board(settings, screen)
         self.background = Background(settings, screen)
 
+        # the board's rotation animation: it is at `angle` degrees, turning
+        # by `increment` every tick until it reaches `target_angle`, and is
+        # drawn at `draw_angle`, in between its last two angles
+        self.angle = 0
+        self.target_angle = 0
+        self.increment = 0
+        self.draw_angle = 0
+        self.is_rotating = False
+
+        # while the board turns, it is drawn from `board_snapshot`, an image
+        # of it taken before it started turning (None if there isn't one),
+        # its last turned copy is kept in `rotated_frames` by angle
+        self.board_snapshot = None
+        self.rotated_frames = {}
+        self.coins_falling = False
+
+        # the 'ai_hard' bot, which thinks in a background thread
+        self.bot = NegamaxBot(settings.ai_depth, settings.ai_node_budget,
+                              TranspositionTable(settings.ai_table_bytes),
+                              settings.ai_time_limit,
+                              load_book(settings.opening_book_path))
+        self.bot_worker = BotWorker(self.bot)
+
+        # game loop state: the game ends `END_GAME_DELAY` seconds after
+        # someone wins, and the bot moves once it is `bot_ready`,
+        # `BOT_DELAY` seconds into its turn; both are run by `scheduler`,
+        # whose clock is moved on every tick
+        self.is_running = True
+        self.has_quit = False
+        self.handling_events = True
+        self.scheduler = Scheduler()
+        self.bot_ready = False
+        self.bot_action = None
+        self.end_game_action = None
+
+        # the game advances in fixed ticks of 1 / `settings.tick_rate`
+        # seconds; `tick_accumulator` is the time since the last one, and
+        # things are drawn `interpolation` of the way to the next one
+        self.tick_accumulator = 0
+        self.interpolation = 0
+
+        # AI mechanics
+        self.bot_mode = game_mode == "ai_easy" or game_mode == 'ai_hard'
+        self.difficulty = 0 # 0 for easy, 1 for hard
+        if game_mode == 'ai_hard':
+            self.difficulty = 1
+
+        # with dirty rendering, only the parts of the screen that changed
+        # are redrawn: the areas in `dirty_rects`, the UI while
+        # `ui_dirty_time` is positive, where moving coins were last drawn
+        # (`coins_rect`) and are now, or everything if `full_redraw`
+        self.dirty_rects = []
+        self.coins_rect = None
+        self.full_redraw = True
+        self.ui_dirty_time = 0
+        ui_rects = [element.rect for element in self.ui_elements.values()]
+        self.ui_rect = ui_rects[0].unionall(ui_rects[1:])
+
+        # per-frame stage timings, F3 shows or hides them
+        self.profiler = FrameProfiler(settings.profile_capacity,
+                                      settings.profile_frames,
+                                      settings.profile_overlay)
+
         # initially it is player 1's turn
         self.next_turn()
 
     def next_turn(self):
         """Go to the next turn."""
-        self.state = next(GAME_STATES)
+        self.state = self.game_state.player
 
         self.update_interface()
 
+        # the bot waits a moment into its turn before moving
+        self.scheduler.cancel(self.bot_action)
+        self.bot_ready = False
+        self.bot_action = None
+        if self.bot_mode and self.state == 2:
+            self.bot_action = self.scheduler.after(BOT_DELAY, self.wake_bot)
+
+    def wake_bot(self):
+        """Let the bot move, once it has its move."""
+        self.bot_ready = True
+
+    def end_game(self):
+        """Stop the game loop, after someone has won."""
+        self.is_running = False
+
     def update_interface(self):
         """Update the interface to say whose turn it currently is."""
 
         self.ui_elements['player'].set_text(
             f"{PLAYER_DICT[self.state]}'s turn.")
+        self.ui_dirty_time = ACTIVE_SECONDS
 
 
     def draw_background(self):
@@ -83,104 +191,79 @@ class Game:
 
         # coin is spawned at the top of the column closest to the mouse
         col = closest_column(board, mouse_pos, self.settings)
-        try:
-            start_pos = board.rects[0][col].center
-        except TypeError:
+        if col is None or not self.game_state.can_drop(col):
+            # outside the board, or column is full: do nothing
             return
 
+        start_pos = board.rects[0][col].center
         start_pos = (start_pos[0] + board_xy[1], start_pos[1] + board_xy[0])
 
         # coin will fall to the next open row
-        row = get_next_open_row(board, col)
-        try:
-            end_pos = board.rects[row][col].center
-        except TypeError:
-            # if row is full: do nothing
-            return
-
+        row = get_next_open_row(self.game_state, col)
+        end_pos = board.rects[row][col].center
         end_pos = (end_pos[0] + board_xy[1], end_pos[1] + board_xy[0])
 
-        # add it to the group of coin sprites
-        self.coins.add(Coin(self.settings, self.screen, self.state,
-                            start_pos, end_pos, self.music))
+        # add it to the coins in play
+        self.coins.add([self.state], [start_pos], [end_pos])
 
         print(f"dropped at col {col}.")
 
-        # place the current player's number at (row, col)
-        board.grid[row][col] = self.state
+        # place the current player's coin at (row, col)
+        self.game_state.play(col)
+
+        print(self.game_state.grid)
 
-        print(board.grid)
 
+    def update_coins(self, time_delta):
+        """
+        Move all coins in play on by `time_delta` seconds, and make a sound
+        if any of them landed.
+        """
+        self.coins_falling = self.coins.is_falling()
+        if self.coins.update(time_delta):
+            self.music.play('coin_drop')
 
-    def update_coins(self):
-        """Update positions of all coins in play."""
-        for coin in self.coins:
-            coin.update()
+        # where the coins moved need redrawing, even if more ticks run
+        # before the next frame is drawn
+        if self.coins_falling and self.settings.dirty_rendering:
+            self.dirty_rects.append(self.coins.moving_rect())
 
     def draw_coins(self):
-        """Draw all coins in play."""
-        for coin in self.coins:
-            coin.draw()
+        """Draw all coins in play, in between the last two ticks."""
+        self.coins.draw(interpolation=self.interpolation)
 
-    def check_win(self):
+    def check_win(self, full_board=False):
         """
         Returns true if a winning connection exists in the board,
         false otherwise.
+
+        Unless `full_board` is true, this is the result `GameState` got by
+        only checking lines through the coins changed by the last move: any
+        other line would have already ended the game.
         """
-        connect_num = self.settings.connect_num
-        board = self.board
-        player = self.state
-        n_cols = board.n_cols
-        n_rows = board.n_rows
-
-        # Check horizontal
-        for c in range(n_cols - (connect_num - 1)):
-            for r in range(n_rows):
-                count = 0
-                for i in range(connect_num):
-                    if board.grid[r][c] != 0:
-                        player = board.grid[r][c]
-                    if board.grid[r][c+i] == player:
-                        count += 1
-                    if count == connect_num:
-                        return True
-
-        # Check vertical
-        for c in range(n_cols):
-            for r in range(n_rows - (connect_num - 1)):
-                count = 0
-                for i in range(connect_num):
-                    if board.grid[r][c] != 0:
-                        player = board.grid[r][c]
-                    if board.grid[r+i][c] == player:
-                        count += 1
-                    if count == connect_num:
-                        return True
-
-        # Check left diagonal
-        for c in range(n_cols - (connect_num - 1)):
-            for r in range(n_rows - (connect_num - 1)):
-                count = 0
-                for i in range(connect_num):
-                    if board.grid[r][c] != 0:
-                        player = board.grid[r][c]                    
-                    if board.grid[r+i][c+i] == player:
-                        count += 1
-                    if count == connect_num:
-                        return True
-
-        # Check right diagonal
-        for c in range(n_cols - (connect_num - 1)):
-            for r in range((connect_num - 1), n_rows):
-                count = 0
-                for i in range(connect_num):
-                    if board.grid[r][c] != 0:
-                        player = board.grid[r][c]
-                    if board.grid[r-i][c+i] == player:
-                        count += 1
-                    if count == connect_num:
-                        return True
-        return False
+        if full_board:
+            winners, _ = find_connections(
+                self.game_state.grid, self.settings.connect_num)
+            return any(winners.values())
+
+        return self.game_state.winner is not None
+
+    def start_rotation(self, angle):
+        """
+        Start turning the board by `angle` degrees. The coins are moved once
+        the animation has finished, by `rotate_board`.
+        """
+        # the board is changing, so whatever the bot is working on is stale
+        self.bot_worker.cancel()
+
+        self.target_angle += angle
+        self.angle = self.target_angle - angle
+
+        # every rotation takes the same number of ticks, so 180 degree
+        # flips rotate twice as fast
+        self.increment = angle / 36
+        self.is_rotating = True
+        self.board_snapshot = None
 
     def rotate_board(self, angle):
         """
@@ -188,12 +271,15 @@ class Game:
         this `Game`'s board and coins to reflect the new state.
         Additionally updates game-wide settings and the screen.
         """
+        # rotated_grid is where each coin is right after rotating, before
+        # it falls; the game state works out where every coin comes to rest
         if angle == -90:
-            rotated_grid = np.rot90(self.board.grid, k=1, axes=(1, 0))
+            rotated_grid = np.rot90(self.game_state.grid, k=1, axes=(1, 0))
         elif angle == 90:
-            rotated_grid = np.rot90(self.board.grid, k=1, axes=(0, 1))
+            rotated_grid = np.rot90(self.game_state.grid, k=1, axes=(0, 1))
         else:
-            rotated_grid = np.rot90(self.board.grid, k=2, axes=(0, 1))
+            rotated_grid = np.rot90(self.game_state.grid, k=2, axes=(0, 1))
+        self.game_state.play(rotation_for_angle(angle))
 
         n_rows, n_cols = rotated_grid.shape
 
@@ -202,315 +288,446 @@ class Game:
         settings = self.settings
         settings.set_board_size(n_rows=n_rows, n_cols=n_cols, adjust=False)
         self.screen = pygame.display.set_mode(self.settings.screen_size)
+        self.full_redraw = True
+        self.board_snapshot = None
 
         # reset board, coins, background
         board = Board(settings, self.screen)
         self.board = board
-        self.coins = pygame.sprite.Group()
+        self.coins = Coins(settings, self.screen)
         self.background = Background(settings, self.screen)
         board_xy = (settings.padding_left, settings.padding_top)
 
-        # from the bottom row up: drop the floating coins
-        for row in range(n_rows - 1, -1, -1):
-            for col in range(n_cols):
+        # drop the floating coins, each one lands on the next open row of
+        # its column; positions are (y, x) of a cell's centre on the screen
+        _, from_cells, to_cells = settle(rotated_grid)
+        length = board.cell_length
+        offset = np.array(board_xy[::-1]) + length // 2
+        start_positions = from_cells * length + offset
+        end_positions = to_cells * length + offset
+        players = rotated_grid[from_cells[:, 0], from_cells[:, 1]].tolist()
 
-                player = rotated_grid[row][col]
+        self.coins.add(players, start_positions, end_positions)
+        self.music.play('plate')
 
-                if player != 0:
-                    rotated_grid[row][col] = 0
+    def run(self):
+        """Run the game loop, then show game over screen after the game ends."""
 
-                    # find where to drop to, and create a coin to drop there
-                    landing_row = get_next_open_row(board, col)
+        clock = self.clock
+        settings = self.settings
 
-                    start_pos = board.rects[row][col].center
-                    start_pos = (start_pos[0] + board_xy[1],
-                                start_pos[1] + board_xy[0])
+        self.music.play('game')
 
-                    end_pos = board.rects[landing_row][col].center
-                    end_pos = (end_pos[0] + board_xy[1],
-                                end_pos[1] + board_xy[0])
+        # main game loop
+        try:
+            while self.is_running:
+
+                # the game advances at a fixed tick rate however fast
+                # frames are drawn, up to `frame_rate` (0 for no cap), and
+                # only every so often while nothing is happening
+                time_delta = self.pacer.tick(not self.is_idle())
+
+                self.run_frame(time_delta)
+        finally:
+            # also when the window is closed mid-game
+            if settings.profile_path and self.profiler.count:
+                self.profiler.export(settings.profile_path)
+            if settings.record_path and self.game_state.history:
+                write_records(settings.record_path,
+                              [GameRecord.from_game_state(self.game_state)])
+
+        # quit from the game: go straight back to the menu
+        if self.has_quit:
+            return
 
-                    self.coins.add(Coin(self.settings, self.screen, player,
-                                        start_pos, end_pos, self.music))
-                    self.music.play('plate')
-                    # update grid
-                    board.grid[landing_row][col] = player
+        # exited game loop: someone has won, so say that they've won
+        game_over = GameOver(settings, self.screen, clock)
+        game_over.set_winner(self.state)
+        game_over.show()
 
-    def run(self):
-        """Run the game loop, then show game over screen after the game ends."""
+        # reset screen size to original
+        settings.set_board_size(n_rows=self.original_n_rows,
+                                n_cols=self.original_n_cols,
+                                adjust=False)
+        self.screen = pygame.display.set_mode(self.settings.screen_size)
 
-        clock = self.clock
-        music = self.music
-        screen = self.screen
+    def is_idle(self):
+        """
+        Returns true if nothing in the game will change until a player does
+        something: nothing is moving, and nobody is waiting for the bot.
+        """
+        bot_turn = self.bot_mode and self.state == 2
+        return (self.handling_events and not bot_turn and
+                not self.is_rotating and not self.angle and
+                not self.coins.is_falling() and not self.profiler.overlay and
+                not self.scheduler.pending())
+
+    def quit(self):
+        """Stop the game loop and go back to the menu without a winner."""
+        self.bot_worker.cancel()
+        self.is_running = False
+        self.has_quit = True
+
+    def run_frame(self, time_delta):
+        """
+        Run one frame of the game loop: handle events, advance the game by
+        as many fixed ticks as fit in the time since the last frame,
+        `time_delta` seconds, then draw everything in between the last two
+        ticks.
+        """
         settings = self.settings
+        profiler = self.profiler
+
+        profiler.begin_frame()
+
+        self.handle_events()
+        profiler.mark('events')
+        if not self.is_running:
+            return
+
+        # time left over from the last frame is carried into this one;
+        # after a long stall, the game is only caught up so far, rather
+        # than spending ever longer catching up
+        tick_time = 1 / settings.tick_rate
+        self.tick_accumulator = min(self.tick_accumulator + time_delta,
+                                    MAX_TICKS_PER_FRAME * tick_time)
+        while self.tick_accumulator >= tick_time:
+            self.tick_accumulator -= tick_time
+            self.tick()
+        self.interpolation = self.tick_accumulator / tick_time
+
+        self.draw(time_delta)
+        profiler.end_frame()
+
+    def handle_events(self):
+        """Handle the mouse, keyboard and window events since last frame."""
         ui_manager = self.ui_manager
-        board = self.board
+        bot_mode = self.bot_mode
+        profiler = self.profiler
+
+        # handle events
+        for event in self.pacer.events():
+
+            if event.type == pygame.QUIT:
+                # close window clicked: stop the game
+                sys.exit()
+
+            if event.type == pygame.KEYDOWN and event.key == K_F3:
+                profiler.toggle_overlay()
+                self.full_redraw = True
+
+            if event.type in EXPOSE_EVENTS:
+                # the window was uncovered, and needs drawing again
+                self.full_redraw = True
+
+            # the UI may change in response to any event, for as long as
+            # the frame pacer runs at full rate after it
+            self.ui_dirty_time = ACTIVE_SECONDS
+
+            if self.handling_events:
+                if (event.type == pygame.MOUSEBUTTONDOWN and
+                        event.button == LEFT_MOUSE_BUTTON and
+                        (self.state == 1 or not bot_mode)):
+                    # left mouse click detected: drop coin
+                    mouse_pos = pygame.mouse.get_pos()
+
+                    if in_board(mouse_pos, self.board):
+                        self.drop_coin(mouse_pos)
+                        if self.check_win():
+                            self.handling_events = False
+                        else:
+                            self.next_turn()
+
+                if (event.type == pygame.KEYDOWN):
+                    pressed_keys = pygame.key.get_pressed()
+                    if pressed_keys[K_q]:
+                        self.start_rotation(-90)
+
+                    elif pressed_keys[K_w]:
+                        self.start_rotation(90)
+
+                    elif pressed_keys[K_e]:
+                        self.start_rotation(180)
+
+                    elif pressed_keys[K_ESCAPE]:
+                        self.quit()
+                        return
+
+                if event.type == pygame.USEREVENT:
+                    if event.user_type == pygame_gui.UI_BUTTON_PRESSED:
+                        # handle button events
+                        if (event.ui_element ==
+                                self.ui_elements['rotate_90_clockwise']):
+                            self.start_rotation(-90)
+                        elif (event.ui_element ==
+                                self.ui_elements['rotate_90_anticlockwise']):
+                            self.start_rotation(90)
+                        elif (event.ui_element ==
+                                self.ui_elements['rotate_180']):
+                            self.start_rotation(180)
+                        elif event.ui_element == self.ui_elements['quit']:
+                            self.quit()
+                            return
 
-        angle = 0
-        target_angle = 0
-        is_rotating = False
+            # let pygame_gui handle internal UI events
+            ui_manager.process_events(event)
 
-        music.play('game')
+    def tick(self):
+        """
+        Advance the game by one tick, 1 / `settings.tick_rate` seconds: let
+        the bot move, turn the board, end the game, and move the coins.
+        """
+        settings = self.settings
+        bot_mode = self.bot_mode
+        difficulty = self.difficulty
+        profiler = self.profiler
+
+        # run anything that has come due, such as waking the bot
+        self.scheduler.update(1 / settings.tick_rate)
+
+        # AI mechanics: the bot waits for any rotation to finish
+        bot_turn = (bot_mode and self.state == 2 and self.handling_events and
+                    not self.is_rotating)
+        if bot_turn and difficulty == 1:
+            # think in the background during the delay, and play the
+            # move once both the delay and the search are over
+            if not self.bot_worker.is_busy():
+                self.bot_worker.start(self.game_state)
+            if self.bot_ready and self.bot_worker.done():
+                self.handling_events = self.play_bot_move(
+                    self.bot_worker.result())
+        elif bot_turn and self.bot_ready:
+            self.handling_events = self.call_bot(settings)
+
+        profiler.mark('bot')
+
+        if self.angle == self.target_angle:
+            if self.is_rotating:
+                self.rotate_board(self.target_angle)
+                # reset rotation variables
+                self.is_rotating = False
+                self.target_angle = 0
+                self.angle = 0
+                if self.check_win():
+                    self.handling_events = False
+                else:
+                    self.next_turn()
+        else:
+            self.angle += self.increment
 
-        # main game loop
-        is_running = True
-        handling_events = True
-        end_game_delay = 100
+        if not self.handling_events and self.end_game_action is None:
+            # someone has won: the game ends a moment later
+            self.end_game_action = self.scheduler.after(END_GAME_DELAY,
+                                                        self.end_game)
 
-        # AI mechanics
-        bot_mode = self.game_mode == "ai_easy" or self.game_mode == 'ai_hard'
-        difficulty = 0 # 0 for easy, 1 for hard
-        if self.game_mode == 'ai_hard':
-            difficulty = 1
-        bot_delay = 80
-
-        while is_running:
-
-            # keep framerate at 120 (not sure if this works)
-            time_delta = clock.tick(120)/1000.0
-
-            # handle events
-            for event in pygame.event.get():
-
-                if event.type == pygame.QUIT:
-                    # close window clicked: stop the game
-                    sys.exit()
-
-                if handling_events:
-                    if (event.type == pygame.MOUSEBUTTONDOWN and
-                            event.button == LEFT_MOUSE_BUTTON and
-                            (self.state == 1 or not bot_mode)):
-                        # left mouse click detected: drop coin
-                        mouse_pos = pygame.mouse.get_pos()
-                        bot_delay = 80
-                    
-                        if in_board(mouse_pos, self.board):
-                            self.drop_coin(mouse_pos)
-                            self.music.play('plate')
-                            if self.check_win():
-                                handling_events = False
-                            else:
-                                self.next_turn()
-
-                    if (event.type == pygame.KEYDOWN):
-                        pressed_keys = pygame.key.get_pressed()
-                        if pressed_keys[K_q]:
-                            target_angle -= 90
-                            angle = target_angle + 90
-                            increment = -2.5
-                            is_rotating = True
-
-                        elif pressed_keys[K_w]:
-                            target_angle += 90
-                            angle = target_angle - 90
-                            increment = 2.5
-                            is_rotating = True
-
-                        elif pressed_keys[K_e]:
-                            target_angle += 180
-                            angle = target_angle - 180
-                            # rotate twice as fast
-                            increment = 5.0
-                            is_rotating = True
-
-                        elif pressed_keys[K_ESCAPE]:
-                            return
+        profiler.mark('rotation')
 
-                    if event.type == pygame.USEREVENT:
-                        if event.user_type == pygame_gui.UI_BUTTON_PRESSED:
-                            # handle button events: copy paste time
-                            if (event.ui_element ==
-                                    self.ui_elements['rotate_90_clockwise']):
-                                target_angle -= 90
-                                angle = target_angle + 90
-                                increment = -2.5
-                                is_rotating = True
-                            elif (event.ui_element ==
-                                    self.ui_elements['rotate_90_anticlockwise']):
-                                target_angle += 90
-                                angle = target_angle - 90
-                                increment = 2.5
-                                is_rotating = True
-                            elif (event.ui_element ==
-                                    self.ui_elements['rotate_180']):
-                                target_angle += 180
-                                angle = target_angle - 180
-                                increment = 5.0
-                                is_rotating = True
-                            elif event.ui_element == self.ui_elements['quit']:
-                                return
-
-                # let pygame_gui handle internal UI events
-                ui_manager.process_events(event)
-
-            # AI mechanics
-            if bot_mode and self.state == 2 and not bot_delay and handling_events:
-                handling_events = self.call_bot(board, settings, difficulty)
-            else:
-                bot_delay -= 1
-
-
-            if angle == target_angle:
-                if is_rotating:
-                    self.rotate_board(target_angle)
-                    # reset rotation variables
-                    is_rotating = False
-                    target_angle = 0
-                    angle = 0
-                    bot_delay = 80
-                    if self.check_win():
-                        handling_events = False
-                    else:
-                        self.next_turn()
-            else:
-                angle += increment
-
-            if not handling_events and end_game_delay:
-                end_game_delay -= 1
-            elif not handling_events and not end_game_delay:
-                is_running = False
-
-            # draw background before coins
-            # self.update_background()
-            self.draw_background()
-
-            # update and draw ui elements
-            ui_manager.update(time_delta)
-            ui_manager.draw_ui(self.screen)
-
-            # update coins' positions and draw them
-            self.update_coins()
-            self.draw_coins()
+        self.update_coins(1 / settings.tick_rate)
+        profiler.mark('coins')
 
-            # rect and sub screenshots the entire board as it currently is
-            margin_x = settings.padding_left
-            margin_y = settings.padding_top
-            rect = pygame.Rect((margin_x, margin_y), settings.board_size)
-            sub = screen.subsurface(rect)
-            pos = (settings.board_size[0] / 2 + margin_x,
-                settings.board_size[1] / 2 + margin_y)
+    def draw(self, time_delta):
+        """
+        Draw the frame, `time_delta` seconds after the last one, and update
+        the display.
+        """
+        settings = self.settings
+        profiler = self.profiler
+
+        # the screen is replaced when the board is rotated
+        screen = self.screen
 
-            # blitRotate was completely "inspired" by the post on StackOverflow
-            # pos is inputted twice to center the spinning axis and the center
-            # of the board, THIS ONLY WORKS FOR A SQUARE BOARD, will need
-            # changes for a rectangular board
-            blit_rotate(screen, sub, pos, pos, angle, margin_x, margin_y)
+        self.ui_manager.update(time_delta)
+        profiler.mark('ui')
 
+        # the board is drawn between its angle now and at the next tick
+        self.draw_angle = self.angle
+        if self.angle != self.target_angle:
+            self.draw_angle += self.increment * self.interpolation
+
+        if settings.dirty_rendering:
+            rects = self.dirty_regions(time_delta)
+        else:
+            rects = [screen.get_rect()]
+
+        # draw the parts of the screen that need it, nothing else is
+        # touched (only one part, the whole screen, without dirty rendering)
+        for rect in rects:
+            screen.set_clip(rect)
+            self.draw_frame()
+        screen.set_clip(None)
+
+        profiler.draw_overlay(screen)
+        profiler.mark('overlay')
+
+        if not settings.dirty_rendering:
             # update the whole display Surface
             pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+        profiler.mark('flip')
 
+    def draw_frame(self):
+        """Draw the background, UI, coins, and board at its current angle."""
+        screen = self.screen
+        settings = self.settings
+        profiler = self.profiler
 
-        # exited game loop: someone has won, so say that they've won
-        game_over = GameOver(settings, screen, clock)
-        game_over.set_winner(self.state)
-        game_over.show()
+        # draw background before coins
+        # self.update_background()
+        self.draw_background()
+        profiler.mark('background')
 
-        # reset screen size to original
-        settings.set_board_size(n_rows=self.original_n_rows,
-                                n_cols=self.original_n_cols,
-                                adjust=False)
-        self.screen = pygame.display.set_mode(self.settings.screen_size)
+        self.ui_manager.draw_ui(screen)
+        profiler.mark('ui')
 
+        angle = self.draw_angle
+        if not angle:
+            # the board isn't turning, so it is drawn where it is
+            self.draw_coins()
+            profiler.mark('coins')
+            return
 
-    def call_bot(self, board, settings, difficulty):
+        # the board and its coins don't change while it turns (unless a
+        # coin is still falling), so the same image of it is turned each
+        # frame, on top of the board drawn unturned
+        if self.board_snapshot is None or self.coins_falling:
+            self.board_snapshot = self.snapshot_board()
+            self.rotated_frames = {}
+        profiler.mark('coins')
+
+        margin_x = settings.padding_left
+        margin_y = settings.padding_top
+        pos = (settings.board_size[0] / 2 + margin_x,
+            settings.board_size[1] / 2 + margin_y)
+
+        # blitRotate was completely "inspired" by the post on StackOverflow
+        # pos is inputted twice to center the spinning axis and the center
+        # of the board, THIS ONLY WORKS FOR A SQUARE BOARD, will need
+        # changes for a rectangular board; with dirty rendering this is
+        # drawn once per changed area, so the board is only turned once
+        rotated_image = self.rotated_frames.get(angle)
+        if rotated_image is None:
+            rotated_image = pygame.transform.rotate(self.board_snapshot,
+                                                    angle)
+            self.rotated_frames = {angle: rotated_image}
+        blit_rotate(screen, self.board_snapshot, pos, pos, angle,
+                    margin_x, margin_y, rotated_image)
+        profiler.mark('blit_rotate')
+
+    def snapshot_board(self):
+        """
+        Returns an image of the board area as it is drawn unturned: the
+        background, the board, and the coins on it.
+        """
+        rect = self.board.rect
+        snapshot = pygame.Surface(rect.size)
+        snapshot.blit(self.background.image_game, (0, 0), rect)
+        snapshot.blit(self.board.image, (0, 0))
+        self.coins.draw(snapshot, (-rect.x, -rect.y), self.interpolation)
+        return snapshot
+
+    def dirty_regions(self, time_delta):
+        """
+        Returns a list of the `Rect`s of the screen that changed since the
+        last frame, `time_delta` seconds ago, and have to be redrawn.
+        """
+        screen_rect = self.screen.get_rect()
+        rects = self.dirty_rects
+        self.dirty_rects = []
+
+        # the moving coins are drawn somewhere else next frame, even after
+        # a full redraw
+        coins_rect = self.coins.moving_rect()
+        rects.extend(rect for rect in (self.coins_rect, coins_rect)
+                     if rect is not None)
+        self.coins_rect = coins_rect
+
+        if self.full_redraw:
+            self.full_redraw = False
+            return [screen_rect]
+
+        if self.ui_dirty_time > 0:
+            self.ui_dirty_time -= time_delta
+            rects.append(self.ui_rect)
+
+        if self.angle or self.is_rotating:
+            # the turning board's corners stick out up to half a diagonal
+            # from its centre
+            board_rect = self.board.rect
+            rects.append(board_rect.inflate(
+                board_rect.width // 2, board_rect.height // 2))
+
+        if self.profiler.overlay_rect is not None:
+            rects.append(self.profiler.overlay_rect)
+
+        rects = [rect.clip(screen_rect) for rect in rects]
+        if len(rects) > MAX_DIRTY_RECTS:
+            rects = [rects[0].unionall(rects[1:])]
+        return rects
+
+
+    def call_bot(self, settings):
+        """
+        Play the 'ai_easy' bot's move, a coin in a random column. Returns
+        false if the bot has won, true otherwise. The 'ai_hard' bot's
+        moves are searched for in the background by `bot_worker` instead.
+        """
         mouse_pos = (random.randint(
                         settings.padding_left,
                         settings.board_size[0] + settings.padding_left),
                         settings.padding_y+1)
 
-        if difficulty == 0:
-            print(mouse_pos)
-            self.drop_coin(mouse_pos)
-            if self.check_win():
-                return False
-            else:
-                self.next_turn()
-                return True
-
-        elif difficulty == 1:
-            # prioritise center area
-            for i in range(board.n_rows-1, 0, -1):
-                for j in range(board.n_cols//2 - 1, board.n_cols//2 + 1):
-                    if not board.grid[i][j] and i < 4:
-                        mouse_pos = (j*settings.coin_length+settings.padding_left, settings.padding_y+1)
-                        break
-
-            # find 3's, try to complete
-            target_location = self.check_threes()
-            print(target_location)
-            if target_location:
-                if not board.grid[target_location[0], target_location[1]]:
-                    print('smart')
-                    mouse_pos = (target_location[0]*settings.coin_length + settings.padding_left, settings.padding_y+1)
-
-            x_pos = mouse_pos[0]
-            col = int(math.floor(x_pos / board.cell_length))
-            print('AI dropped col ', col)
-
-            self.drop_coin(mouse_pos)
-            if self.check_win():
-                return False
-            else:
-                self.next_turn()
-                return True
-
-    def check_threes(self):
-        connect_num = self.settings.connect_num
-        board = self.board
-        player = self.state
-        n_cols = board.n_cols
-        n_rows = board.n_rows
-
-        connect_num -= 1
-        # Check horizontal
-        for c in range(n_cols - (connect_num - 1)):
-            for r in range(n_rows):
-                count = 0
-                for i in range(connect_num):
-                    if board.grid[r][c+i] == player:
-                        count += 1
-                    if count == connect_num:
-                        print('hori')
-                        return [r, c+i]
-
-        # Check vertical
-        for c in range(n_cols):
-            for r in range(n_rows - (connect_num - 1)):
-                count = 0
-                for i in range(connect_num):
-                    if board.grid[r+i][c] == player:
-                        count += 1
-                    if count == connect_num:
-                        print('vert')
-                        return [r+i, c]
-
-        # Check left diagonal
-        for c in range(n_cols - (connect_num - 1)):
-            for r in range(n_rows - (connect_num - 1)):
-                count = 0
-                for i in range(connect_num):
-                    if board.grid[r+i][c+i] == player:
-                        count += 1
-                    if count == connect_num:
-                        print('l diag')
-                        return [r+i, c+i]
-
-        # Check right diagonal
-        for c in range(n_cols - (connect_num - 1)):
-            for r in range((connect_num - 1), n_rows):
-                count = 0
-                for i in range(connect_num):
-                    if board.grid[r-i][c+i] == player:
-                        count += 1
-                    if count == connect_num:
-                        print('r diag')
-                        return [r-i, c+i]
-        return False
+        print(mouse_pos)
+        self.drop_coin(mouse_pos)
+        if self.check_win():
+            return False
+        else:
+            self.next_turn()
+            return True
+
+    def play_bot_move(self, move):
+        """
+        Play `move`, found by the 'ai_hard' bot's search. Returns false if
+        the bot has won, true otherwise.
+        """
+        print(f"AI searched {self.bot.nodes} positions, "
+              f"{self.bot.depth_reached} moves ahead, "
+              f"table hit rate {self.bot.table.hit_rate():.0%}.")
+
+        if move not in ROTATION_ANGLES:
+            print('AI dropped col ', move)
+        return self.play_move(move)
+
+    def play_move(self, move):
+        """
+        Play `move`, a column to drop a coin in or a rotation, as in
+        `GameState.play`, for whoever's turn it is. Returns false if the
+        move has won the game, true otherwise. Raises ValueError if `move`
+        can't be played, such as None.
+        """
+        settings = self.settings
+
+        if move not in self.game_state.legal_moves():
+            raise ValueError(f"{move!r} is not a legal move")
+
+        if move in ROTATION_ANGLES:
+            # the rotation is played once its animation has finished
+            self.start_rotation(ROTATION_ANGLES[move])
+            return True
+
+        mouse_pos = (move*settings.coin_length + settings.padding_left, settings.padding_y+1)
+
+        self.drop_coin(mouse_pos)
+        if self.check_win():
+            return False
+        else:
+            self.next_turn()
+            return True
 
 # functions that are less closely tied to game objects go below
 
 
-def blit_rotate(surf, image, pos, originPos, angle, x, y):
+def blit_rotate(surf, image, pos, originPos, angle, x, y, rotated_image=None):
 
     # calcaulate the axis aligned bounding box of the rotated image
     w, h = image.get_size()
@@ -530,8 +747,9 @@ def blit_rotate(surf, image, pos, originPos, angle, x, y):
     origin = (pos[0] - originPos[0] + min_box[0] - pivot_move[0],
             pos[1] - originPos[1] - max_box[1] + pivot_move[1])
 
-    # get a rotated image
-    rotated_image = pygame.transform.rotate(image, angle)
+    # get a rotated image, unless it was already turned
+    if rotated_image is None:
+        rotated_image = pygame.transform.rotate(image, angle)
 
     # rotate and blit the image
     surf.blit(rotated_image, origin)
@@ -561,17 +779,9 @@ def closest_column(board, mouse_pos, settings):
     return col
 
 
-def get_next_open_row(board, col):
+def get_next_open_row(game_state, col):
     """
-    Finds the topmost vacant cell in column `col`, in `board`'s grid.
+    Finds the topmost vacant cell in column `col`, in `game_state`'s grid.
     Returns that cell's corresponding row index.
     """
-    n_rows = board.n_rows
-
-    # check row by row, from bottom row to top row ([0][0] is topleft of grid)
-    for row in range(n_rows - 1, -1, -1):
-        if board.grid[row][col] == 0:
-            return row
-
-    # so pylint doesn't complain
-    return None
+    return game_state.bitboard.next_open_row(col)
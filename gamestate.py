@@ -0,0 +1,206 @@
+import numpy as np
+
+from bitboard import Bitboard
+from rules import connects_through_any
+
+# moves are either a column number to drop a coin in, or one of these
+ROTATE_CLOCKWISE = -1
+ROTATE_ANTICLOCKWISE = -2
+ROTATE_180 = -3
+
+# rotation moves and the angle they turn the board by, in degrees
+ROTATION_ANGLES = {
+    ROTATE_CLOCKWISE: -90,
+    ROTATE_ANTICLOCKWISE: 90,
+    ROTATE_180: 180
+}
+ROTATIONS = tuple(ROTATION_ANGLES)
+
+
+class GameState:
+    """
+    Class containing the rules and state of a game of Connect 4 Pancake,
+    with no rendering: whose turn it is, where the coins are, and who has
+    won. Doesn't import pygame, so games can be played without a display.
+
+    A player wins if, after their move, there is a line of `connect_num`
+    coins on the board. A full board with no line is a draw.
+    """
+
+    def __init__(self, n_rows=7, n_cols=7, connect_num=4):
+        """Initialise an empty board, with player 1 to move."""
+
+        self.connect_num = connect_num
+        self.bitboard = Bitboard(n_rows, n_cols)
+
+        # grid is a 2D array with 0, 1, 2, the same as `Board.grid` used to
+        # be: it is what lines are checked on, and what gets drawn
+        self.grid = np.zeros((n_rows, n_cols), dtype=np.int8)
+
+        # whose turn it currently is; player 1 is 1, player 2 is 2.
+        self.player = 1
+        self.winner = None
+
+        # cells whose coins changed in the last move, so only lines
+        # through them need checking: the dropped coin, or every coin
+        # that moved after a rotation
+        self.last_move = None
+        self.moved_coins = []
+
+        # (move, undo information) for every move played, for `undo`
+        self.history = []
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Returns a new game with the board size and rules in `settings`."""
+        return cls(settings.n_rows, settings.n_cols, settings.connect_num)
+
+    @property
+    def n_rows(self):
+        return self.bitboard.n_rows
+
+    @property
+    def n_cols(self):
+        return self.bitboard.n_cols
+
+    def copy(self):
+        """Returns a copy of this game, which can be played independently."""
+        other = GameState.__new__(GameState)
+        other.connect_num = self.connect_num
+        other.bitboard = self.bitboard.copy()
+        other.grid = self.grid.copy()
+        other.player = self.player
+        other.winner = self.winner
+        other.last_move = self.last_move
+        other.moved_coins = self.moved_coins[:]
+
+        # undo information is never modified once recorded
+        other.history = self.history[:]
+        return other
+
+    def is_over(self):
+        """Returns true if someone has won, or the board is full."""
+        return self.winner is not None or self.bitboard.is_full()
+
+    def can_drop(self, col):
+        """Returns true if a coin can be dropped in column `col`."""
+        return self.bitboard.can_drop(col)
+
+    def legal_moves(self):
+        """
+        Returns a list of the moves the current player can make: every
+        column that isn't full, then the three rotations.
+        """
+        if self.is_over():
+            return []
+
+        moves = [col for col in range(self.n_cols)
+                 if self.bitboard.can_drop(col)]
+        moves.extend(ROTATIONS)
+        return moves
+
+    def play(self, move):
+        """
+        Plays `move` for the current player, then passes the turn on unless
+        they won. Returns the row the coin landed on for drops,
+        None for rotations.
+        """
+        if move in ROTATION_ANGLES:
+            row = None
+            self.rotate(ROTATION_ANGLES[move])
+        else:
+            row = self.drop(move)
+            if row is None:
+                raise ValueError(f"column {move} is full or off the board")
+
+        if self.winner is None:
+            self.player = 3 - self.player
+
+        return row
+
+    def drop(self, col):
+        """
+        Drops a coin of the current player into column `col` and checks
+        whether it wins, without passing the turn on. Returns the row it
+        landed on, or None (and does nothing) if it can't be dropped.
+        """
+        if not self.bitboard.can_drop(col):
+            return None
+
+        row = self.bitboard.drop(col, self.player)
+        self.grid[row][col] = self.player
+        self.history.append((col, self.winner))
+
+        self.last_move = (row, col)
+        self.moved_coins = []
+        self.check_win([self.last_move])
+
+        return row
+
+    def rotate(self, angle):
+        """
+        Rotates the board by `angle` degrees (-90 is clockwise, 90
+        anticlockwise, anything else is 180), lets the coins fall, then
+        checks for a win, without passing the turn on.
+        """
+        if angle == -90:
+            move = ROTATE_CLOCKWISE
+            rotated_grid = np.rot90(self.grid, k=1, axes=(1, 0))
+        elif angle == 90:
+            move = ROTATE_ANTICLOCKWISE
+            rotated_grid = np.rot90(self.grid, k=1, axes=(0, 1))
+        else:
+            move = ROTATE_180
+            rotated_grid = np.rot90(self.grid, k=2, axes=(0, 1))
+
+        self.history.append((move, (self.bitboard, self.grid, self.winner)))
+
+        self.bitboard = self.bitboard.rotate(angle)
+        self.grid = self.bitboard.to_grid()
+
+        # a line that doesn't go through a cell changed by the coins falling
+        # was already there, rotated, before this move
+        self.last_move = None
+        self.moved_coins = [tuple(cell) for cell in np.argwhere(
+            (self.grid != rotated_grid) & (self.grid != 0))]
+        self.check_win(self.moved_coins)
+
+    def check_win(self, cells):
+        """
+        Makes the current player the winner if any of the coins at the
+        (row, col) positions in `cells` is part of a winning line.
+        """
+        if self.winner is None and connects_through_any(
+                self.grid, cells, self.connect_num):
+            self.winner = self.player
+
+    def undo(self):
+        """Takes back the last move played."""
+        move, undo_info = self.history.pop()
+
+        # the player who moved kept the turn if they won with that move
+        if self.winner is None:
+            self.player = 3 - self.player
+
+        if move in ROTATION_ANGLES:
+            # copies, since other copies of this game may share the history
+            bitboard, grid, self.winner = undo_info
+            self.bitboard = bitboard.copy()
+            self.grid = grid.copy()
+        else:
+            row = self.n_rows - self.bitboard.heights[move]
+            self.bitboard.undrop(move)
+            self.grid[row][move] = 0
+            self.winner = undo_info
+
+        self.last_move = None
+        self.moved_coins = []
+
+
+def rotation_for_angle(angle):
+    """Returns the rotation move that turns the board by `angle` degrees."""
+    if angle == -90:
+        return ROTATE_CLOCKWISE
+    elif angle == 90:
+        return ROTATE_ANTICLOCKWISE
+    return ROTATE_180
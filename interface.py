@@ -5,6 +5,8 @@ import pygame.freetype
 
 import pygame_gui
 
+from pacing import FramePacer
+
 PLAYER_DICT = {1: "Blue", 2: "Red"}
 
 class Interface:
@@ -123,6 +125,7 @@ class GameOver:
         self.settings = settings
         self.screen = screen
         self.clock = clock
+        self.pacer = FramePacer(settings, clock)
 
         # visual layout parameters
         self.margin = 50
@@ -186,9 +189,9 @@ class GameOver:
 
         is_in_game_over_screen = True
         while is_in_game_over_screen:
-            time_delta = self.clock.tick(120)/1000.0
+            time_delta = self.pacer.tick()
 
-            for event in pygame.event.get():
+            for event in self.pacer.events():
                 if event.type == pygame.QUIT:
                     # close window clicked: stop the game
                     sys.exit()
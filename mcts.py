@@ -0,0 +1,201 @@
+import math
+import multiprocessing
+import random
+import time
+
+# how much UCT favours trying less visited moves over winning ones
+EXPLORATION = 1.4
+
+
+class Node:
+    """
+    Class representing a position in the search tree, reached by playing
+    `move` from its parent.
+    """
+
+    def __init__(self, parent, move, player, moves):
+        """
+        Initialise a node reached by `player` playing `move`, from which
+        `moves` can be played.
+        """
+        self.parent = parent
+        self.move = move
+        self.player = player
+        self.children = []
+        self.untried_moves = moves
+
+        # wins counts playouts won by `player`, draws count as half a win
+        self.visits = 0
+        self.wins = 0.0
+
+    def select_child(self, exploration):
+        """Returns the child with the highest UCT score."""
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: (
+            child.wins / child.visits +
+            exploration * math.sqrt(log_visits / child.visits)))
+
+
+class MCTSBot:
+    """
+    Bot that picks its moves with Monte Carlo tree search, using UCT to
+    choose which moves to look at and random games (playouts) to score
+    them. Every column drop and the three rotations are moves.
+
+    With more than one process, each process searches its own tree from
+    the current position (root parallelism), and their visit counts are
+    added up to pick the move.
+    """
+
+    def __init__(self, playouts=1000, time_limit=None, processes=1,
+                 heavy=False, exploration=EXPLORATION, seed=None):
+        """
+        Initialise the bot to run `playouts` playouts, or for `time_limit`
+        seconds, whichever ends first (either may be None, not both).
+        `processes` is the number of processes to search with, None for
+        one per core. Heavy playouts take a winning move whenever there is
+        one, instead of always playing randomly.
+        """
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.processes = processes or multiprocessing.cpu_count()
+        self.heavy = heavy
+        self.exploration = exploration
+        self.random = random.Random(seed)
+        self.pool = None
+
+        # statistics from the last search
+        self.total_playouts = 0
+
+    def best_move(self, game_state):
+        """
+        Returns the move played in the most playouts for the current player
+        in `game_state`, which is left unchanged.
+        """
+        seeds = [self.random.getrandbits(32) for _ in range(self.processes)]
+        if self.playouts is None:
+            playouts = None
+        else:
+            playouts = max(1, self.playouts // self.processes)
+        jobs = [(game_state, playouts, self.time_limit, self.heavy,
+                 self.exploration, seed) for seed in seeds]
+
+        if self.processes == 1:
+            results = [search_job(jobs[0])]
+        else:
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(self.processes)
+            results = self.pool.map(search_job, jobs)
+
+        # add up the visits to each move from every tree
+        visits = {}
+        self.total_playouts = 0
+        for move_visits, n_playouts in results:
+            self.total_playouts += n_playouts
+            for move, count in move_visits.items():
+                visits[move] = visits.get(move, 0) + count
+
+        return max(visits, key=visits.get)
+
+    def close(self):
+        """Shuts down the worker processes, if any were started."""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+# functions that are less closely tied to bot objects go below
+
+
+def search_job(job):
+    """
+    Runs one tree search, in a worker process or not. `job` is a tuple of
+    the arguments to `search`. Returns a dictionary of how many times each
+    move at the root was visited, and the number of playouts run.
+    """
+    game_state, playouts, time_limit, heavy, exploration, seed = job
+    root = search(game_state, playouts, time_limit, heavy, exploration,
+                  random.Random(seed))
+    return {child.move: child.visits for child in root.children}, root.visits
+
+
+def search(game_state, playouts, time_limit, heavy, exploration, rng):
+    """
+    Runs Monte Carlo tree search from `game_state` for `playouts` playouts
+    or `time_limit` seconds, whichever ends first. Returns the root node.
+    """
+    if time_limit is None:
+        stop_time = None
+    else:
+        stop_time = time.perf_counter() + time_limit
+
+    root = Node(None, None, 3 - game_state.player, game_state.legal_moves())
+    while playouts is None or root.visits < playouts:
+        if stop_time is not None and time.perf_counter() > stop_time:
+            break
+
+        node = root
+        state = game_state.copy()
+
+        # selection: go down through fully expanded nodes
+        while not node.untried_moves and node.children:
+            node = node.select_child(exploration)
+            state.play(node.move)
+
+        # expansion: add one child for a move not tried yet
+        if node.untried_moves:
+            move = node.untried_moves.pop(rng.randrange(
+                len(node.untried_moves)))
+            player = state.player
+            state.play(move)
+            child = Node(node, move, player, state.legal_moves())
+            node.children.append(child)
+            node = child
+
+        # simulation and backpropagation
+        winner = playout(state, heavy, rng)
+        while node is not None:
+            node.visits += 1
+            if winner == node.player:
+                node.wins += 1
+            elif winner is None:
+                node.wins += 0.5
+            node = node.parent
+
+    return root
+
+
+def playout(state, heavy, rng, max_moves=None):
+    """
+    Plays random moves in `state` until the game is over, or `max_moves`
+    have been played (by default, twice the number of cells on the board)
+    which is taken as a draw. Returns the winner, or None for a draw.
+    """
+    if max_moves is None:
+        max_moves = 2 * state.n_rows * state.n_cols
+
+    for _ in range(max_moves):
+        moves = state.legal_moves()
+        if not moves:
+            break
+
+        move = None
+        if heavy:
+            move = winning_move(state, moves)
+        if move is None:
+            move = rng.choice(moves)
+        state.play(move)
+
+    return state.winner
+
+
+def winning_move(state, moves):
+    """Returns a move in `moves` that wins straight away, or None."""
+    for move in moves:
+        state.play(move)
+        won = state.winner is not None
+        state.undo()
+        if won:
+            return move
+    return None
@@ -1,11 +1,13 @@
 import sys
-import time
 
 import pygame
 import pygame.freetype
 
 import pygame_gui as gui
+from asset_cache import load_image
 from background import Background
+from pacing import FramePacer
+from scheduler import Scheduler
 
 
 class Menu:
@@ -21,6 +23,7 @@ class Menu:
         self.ui_manager = gui.UIManager(settings.screen_size)
         self.screen = screen
         self.clock = clock
+        self.pacer = FramePacer(settings, clock)
 
         self.background = Background(settings, screen)
         self.fonts = {
@@ -28,7 +31,7 @@ class Menu:
             "small": pygame.freetype.SysFont(name=None, size=16),
 
         }
-        title_image = pygame.image.load(settings.title_image_path)
+        title_image = load_image(settings.title_image_path)
 
         # menu layout settings
         self.button_width = 0.3 * screen.get_width()
@@ -152,44 +155,47 @@ class Menu:
         music.play('menu')
         ui_manager = self.ui_manager
 
+        # once a game mode is picked, the door opens, the bell rings, then
+        # the door closes behind the player and the game starts; the menu
+        # keeps running meanwhile
+        scheduler = Scheduler()
+        self.game_mode = None
+
+        def enter_game(game_mode):
+            music.play('door_open')
+            scheduler.after(0.5, music.play, 'bell')
+            scheduler.after(1.5, start_game, game_mode)
+
+        def start_game(game_mode):
+            music.play('game')
+            music.play('door_close')
+            self.game_mode = game_mode
+
         while True:
-            time_delta = self.clock.tick(120)/1000.0
+            time_delta = self.pacer.tick(scheduler.pending())
+            scheduler.update(time_delta)
+            if self.game_mode is not None:
+                return self.game_mode
 
             # draw background
             self.background.draw_main()
 
-            for event in pygame.event.get():
+            for event in self.pacer.events():
                 if event.type == pygame.QUIT:
                     # close window clicked: stop the game
                     sys.exit()
 
-                if event.type == pygame.USEREVENT:
+                # buttons do nothing once a game mode has been picked
+                if (event.type == pygame.USEREVENT and
+                        not scheduler.pending()):
                     if event.user_type == gui.UI_BUTTON_PRESSED:
                         # handle button events
                         if event.ui_element == self.play_sandbox_button:
-                            music.play('door_open')
-                            time.sleep(0.5)
-                            music.play('bell')
-                            time.sleep(1)
-                            music.play('game')
-                            music.play('door_close')
-                            return 'sandbox'
+                            enter_game('sandbox')
                         elif event.ui_element == self.play_ai_easy_button:
-                            music.play('door_open')
-                            time.sleep(0.5)
-                            music.play('bell')
-                            time.sleep(1)
-                            music.play('game')
-                            music.play('door_close')
-                            return 'ai_easy'
+                            enter_game('ai_easy')
                         elif event.ui_element == self.play_ai_hard_button:
-                            music.play('door_open')
-                            time.sleep(0.5)
-                            music.play('bell')
-                            time.sleep(1)
-                            music.play('game')
-                            music.play('door_close')
-                            return 'ai_hard'
+                            enter_game('ai_hard')
                         elif event.ui_element == self.tutorial_button:
                             self.tutorial.show()
                         elif event.ui_element == self.settings_button:
@@ -219,9 +225,10 @@ class Tutorial:
         # shared state with main menu
         self.screen = screen
         self.clock = clock
+        self.pacer = FramePacer(settings, clock)
         self.background = Background(settings, screen)
 
-        tutorial_image = pygame.image.load(settings.tutorial_image_path)
+        tutorial_image = load_image(settings.tutorial_image_path)
 
         # create UI elements: tutorial image takes up the whole window
         self.tutorial = gui.elements.UIImage(
@@ -241,9 +248,9 @@ class Tutorial:
 
         is_in_tutorial = True
         while is_in_tutorial:
-            time_delta = self.clock.tick(120)/1000.0
+            time_delta = self.pacer.tick()
 
-            for event in pygame.event.get():
+            for event in self.pacer.events():
                 if event.type == pygame.QUIT:
                     # close window clicked: stop the game
                     sys.exit()
@@ -277,6 +284,7 @@ class SettingsMenu:
         self.settings = settings
         self.screen = screen
         self.clock = clock
+        self.pacer = FramePacer(settings, clock)
         self.background = Background(settings, screen)
         self.containers = containers
 
@@ -382,12 +390,12 @@ class SettingsMenu:
 
         is_in_settings = True
         while is_in_settings:
-            time_delta = self.clock.tick(120)/1000.0
+            time_delta = self.pacer.tick()
 
             # draw background
             self.background.draw_dark()
 
-            for event in pygame.event.get():
+            for event in self.pacer.events():
                 if event.type == pygame.QUIT:
                     # close window clicked: stop the game
                     sys.exit()
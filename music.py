@@ -1,34 +1,130 @@
 import pygame
 
+# sounds are played on mixer channels reserved for their category, so that
+# a burst of one kind of sound can't cut off another kind
+CATEGORY_CHANNELS = {
+    'ui': 2,
+    'coins': 4
+}
+SOUND_CATEGORIES = {
+    'bell': 'ui',
+    'door_open': 'ui',
+    'door_close': 'ui',
+    'plate': 'coins',
+    'coin_drop': 'coins'
+}
+
+# at most this many copies of a sound play at once (1 if not listed)
+VOICE_LIMITS = {
+    'plate': 2,
+    'coin_drop': 3
+}
+
+# the same sound asked for again within this many milliseconds, such as
+# once per coin in the same frame, is only played once
+COALESCE_MS = 30
+
 
 class Music():
-    """Music player class."""
+    """
+    Music player and sound bank class. Sounds are only loaded the first
+    time they are played (or `preload`ed), and the music keeps playing,
+    rather than being loaded again, if it is asked for while it is on.
+    """
 
     def __init__(self, settings):
-        """Load music and sound files."""
-        self.main_menu_music = settings.music_path['menu_music']
-        self.game_music = settings.music_path['game_music']
-        self.plate = pygame.mixer.Sound(settings.sound_path['plate'])
-        self.bell = pygame.mixer.Sound(settings.sound_path['bell'])
-        self.door_open = pygame.mixer.Sound(settings.sound_path['door_open'])
-        self.door_close = pygame.mixer.Sound(settings.sound_path['door_close'])
+        """Find the music and sound files, nothing is loaded yet."""
+        self.music_paths = {
+            'menu': settings.music_path['menu_music'],
+            'game': settings.music_path['game_music']
+        }
+        self.sound_paths = settings.sound_path
+
+        # the music loaded in the music player, None before any is
+        self.current_music = None
+
+        # loaded sounds, and when each was last started, by name
+        self.sounds = {}
+        self.last_played = {}
+
+        # reserved mixer channels by category, set up on the first sound
+        # (the mixer may not be initialised yet)
+        self.channels = None
 
     def play(self, name):
-        if name == 'game':
-            # Stop the current music if there is any,
-            # and overwrite the mixer_music (music player) with new music
-            pygame.mixer_music.stop()
-            pygame.mixer_music.load(self.game_music)
-            pygame.mixer_music.play(-1)
-        elif name == 'menu':
-            pygame.mixer_music.stop()
-            pygame.mixer_music.load(self.main_menu_music)
-            pygame.mixer_music.play(-1)
-        elif name == 'plate':
-            self.plate.play()
-        elif name == 'bell':
-            self.bell.play()
-        elif name == 'door_open':
-            self.door_open.play()
-        elif name == 'door_close':
-            self.door_close.play()
\ No newline at end of file
+        """Play the music or sound called `name`."""
+        if name in self.music_paths:
+            self.play_music(name)
+        else:
+            self.play_sound(name)
+
+    def play_music(self, name):
+        """
+        Play the music called `name` on repeat, or carry on playing it if
+        it is already on.
+        """
+        if name == self.current_music:
+            if not pygame.mixer_music.get_busy():
+                pygame.mixer_music.unpause()
+            if not pygame.mixer_music.get_busy():
+                pygame.mixer_music.play(-1)
+            return
+
+        # Stop the current music if there is any,
+        # and overwrite the mixer_music (music player) with new music
+        pygame.mixer_music.stop()
+        pygame.mixer_music.load(self.music_paths[name])
+        pygame.mixer_music.play(-1)
+        self.current_music = name
+
+    def preload(self, names):
+        """Load the sounds called `names` now, rather than when played."""
+        for name in names:
+            self.sound(name)
+
+    def sound(self, name):
+        """Returns the sound called `name`, loading it the first time."""
+        if name not in self.sounds:
+            self.sounds[name] = pygame.mixer.Sound(self.sound_paths[name])
+        return self.sounds[name]
+
+    def init_channels(self):
+        """Reserve mixer channels for each category of sound."""
+        n_channels = sum(CATEGORY_CHANNELS.values())
+        if pygame.mixer.get_num_channels() < n_channels:
+            pygame.mixer.set_num_channels(n_channels)
+        pygame.mixer.set_reserved(n_channels)
+
+        self.channels = {}
+        first = 0
+        for category, count in CATEGORY_CHANNELS.items():
+            self.channels[category] = [pygame.mixer.Channel(i)
+                                       for i in range(first, first + count)]
+            first += count
+
+    def play_sound(self, name):
+        """
+        Play the sound called `name` on a free channel of its category,
+        unless it was just played, or too many copies of it are playing.
+        """
+        now = pygame.time.get_ticks()
+        if now - self.last_played.get(name, -COALESCE_MS) < COALESCE_MS:
+            return
+
+        if self.channels is None:
+            self.init_channels()
+
+        sound = self.sound(name)
+        channels = self.channels[SOUND_CATEGORIES[name]]
+        busy = [channel for channel in channels if channel.get_busy()]
+        voices = sum(1 for channel in busy if channel.get_sound() is sound)
+        if voices >= VOICE_LIMITS.get(name, 1):
+            return
+
+        free = [channel for channel in channels if not channel.get_busy()]
+        if not free:
+            # every channel is busy with other sounds: cut one off
+            free = busy
+
+        free[0].play(sound)
+        self.last_played[name] = now
@@ -0,0 +1,187 @@
+"""
+Opening book: the best moves for the first few moves of a game, worked out
+ahead of time and saved to a file, so the bot doesn't search them again.
+
+Build one with, for example:
+
+    python opening_book.py --plies 4 --depth 4
+
+The file is a header followed by an open addressing hash table: an array of
+canonical Zobrist hashes (0 for an empty slot), then an array of the best
+move for each, as an int8. It is memory-mapped rather than read, so loading
+it takes the same time however big it is.
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from ai import NegamaxBot
+from gamestate import GameState
+from transposition import TranspositionTable, canonical_hash, mirror_move
+
+# magic bytes, then n_rows, n_cols, connect_num, a reserved field and the
+# number of slots in the table
+HEADER = struct.Struct('<8sIIIIQ')
+MAGIC = b'C4PBOOK1'
+
+# books opened so far, keyed by path, so each file is only mapped once
+_books = {}
+
+
+class OpeningBook:
+    """Class representing a memory-mapped opening book file."""
+
+    def __init__(self, path):
+        """Map the opening book at `path` into memory."""
+        with open(path, 'rb') as book_file:
+            self.mmap = mmap.mmap(
+                book_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, n_rows, n_cols, connect_num, _, n_slots = \
+            HEADER.unpack_from(self.mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an opening book")
+
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.connect_num = connect_num
+        self.n_slots = n_slots
+
+        # views straight onto the mapped file, nothing is read until used
+        self.keys = np.frombuffer(
+            self.mmap, dtype='<u8', count=n_slots, offset=HEADER.size)
+        self.moves = np.frombuffer(
+            self.mmap, dtype=np.int8, count=n_slots,
+            offset=HEADER.size + 8 * n_slots)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.keys))
+
+    def lookup(self, game_state):
+        """
+        Returns the book move for the current player in `game_state`, or
+        None if the position isn't in the book.
+        """
+        if (game_state.n_rows != self.n_rows or
+                game_state.n_cols != self.n_cols or
+                game_state.connect_num != self.connect_num):
+            return None
+
+        key, mirrored = canonical_hash(game_state.grid, game_state.player)
+        index = key & (self.n_slots - 1)
+        while True:
+            slot_key = int(self.keys[index])
+            if slot_key == 0:
+                return None
+            if slot_key == key:
+                move = int(self.moves[index])
+                if mirrored:
+                    move = mirror_move(move, self.n_cols)
+                return move
+            index = (index + 1) & (self.n_slots - 1)
+
+
+def load_book(path):
+    """
+    Returns the opening book at `path`, or None if there isn't one. Each
+    file is only mapped once.
+    """
+    if path not in _books:
+        if path is None or not os.path.exists(path):
+            _books[path] = None
+        else:
+            _books[path] = OpeningBook(path)
+    return _books[path]
+
+
+def write_book(path, entries, n_rows, n_cols, connect_num):
+    """
+    Writes an opening book to `path`. `entries` maps canonical hashes to
+    the best move in the canonical orientation.
+    """
+    # at most half full, and a power of two so slots are found with a mask
+    n_slots = 1
+    while n_slots < 2 * len(entries):
+        n_slots *= 2
+
+    keys = np.zeros(n_slots, dtype='<u8')
+    moves = np.zeros(n_slots, dtype=np.int8)
+    for key, move in entries.items():
+        index = key & (n_slots - 1)
+        while keys[index]:
+            index = (index + 1) & (n_slots - 1)
+        keys[index] = key
+        moves[index] = move
+
+    with open(path, 'wb') as book_file:
+        book_file.write(HEADER.pack(
+            MAGIC, n_rows, n_cols, connect_num, 0, n_slots))
+        book_file.write(keys.tobytes())
+        book_file.write(moves.tobytes())
+
+
+def build_book(n_rows, n_cols, connect_num, plies, depth, log=print):
+    """
+    Searches every position reachable in fewer than `plies` moves from the
+    start (rotations included) `depth` moves ahead. Returns a dictionary of
+    canonical hashes to the best move in the canonical orientation.
+    """
+    bot = NegamaxBot(depth, table=TranspositionTable())
+    entries = {}
+    frontier = [GameState(n_rows, n_cols, connect_num)]
+
+    for ply in range(plies):
+        start = time.perf_counter()
+        next_frontier = []
+        for state in frontier:
+            key, mirrored = canonical_hash(state.grid, state.player)
+            if key in entries or key == 0:
+                continue
+
+            move = bot.best_move(state)
+            if mirrored:
+                move = mirror_move(move, state.n_cols)
+            entries[key] = move
+
+            for next_move in state.legal_moves():
+                next_state = state.copy()
+                next_state.play(next_move)
+                if not next_state.is_over():
+                    next_frontier.append(next_state)
+
+        log(f"ply {ply}: {len(entries)} positions, "
+            f"{time.perf_counter() - start:.1f}s")
+        frontier = next_frontier
+
+    return entries
+
+
+def main():
+    """Builds an opening book from the command line."""
+    from settings import Settings
+    settings = Settings()
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=settings.n_rows)
+    parser.add_argument('--cols', type=int, default=settings.n_cols)
+    parser.add_argument('--connect', type=int, default=settings.connect_num)
+    parser.add_argument('--plies', type=int, default=4,
+                        help="number of moves from the start to cover")
+    parser.add_argument('--depth', type=int, default=4,
+                        help="how many moves ahead to search each position")
+    parser.add_argument('--output', default=settings.opening_book_path)
+    args = parser.parse_args()
+
+    entries = build_book(args.rows, args.cols, args.connect,
+                         args.plies, args.depth)
+    write_book(args.output, entries, args.rows, args.cols, args.connect)
+    print(f"wrote {len(entries)} positions to {args.output}")
+
+
+# only run main() if this python module is the one being run
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import pygame
+
+# after any event, frames are drawn at full rate for this many seconds, so
+# buttons can finish changing colour when hovered or clicked
+ACTIVE_SECONDS = 0.5
+
+# pygame 1 (as pinned in requirements.txt) can't wait for an event with a
+# timeout, so it looks for events this often instead, in milliseconds
+IDLE_POLL_MS = 20
+
+
+class FramePacer:
+    """
+    Class deciding when an event loop draws its next frame. While anything
+    is moving, or shortly after any event, frames are drawn at
+    `settings.frame_rate`; otherwise the loop sleeps until an event comes,
+    or for at most `settings.idle_frame_time` seconds, so that a screen
+    where nothing changes doesn't keep a core busy.
+
+    Time spent asleep isn't passed on: the frame after it counts as at
+    most one game tick, so anything set off by the event that woke the
+    loop starts from the beginning instead of being caught up.
+
+    Use `tick(busy)` in place of `clock.tick(frame_rate)`, and `events()`
+    in place of `pygame.event.get()`: events that came in while it was
+    asleep are handed out from there, in the order they came.
+    """
+
+    def __init__(self, settings, clock):
+        self.clock = clock
+        self.frame_rate = settings.frame_rate
+        self.idle_timeout = int(1000 * settings.idle_frame_time)
+        self.tick_time = 1 / settings.tick_rate
+
+        # seconds left at full rate since the last event
+        self.active_time = ACTIVE_SECONDS
+
+        # events taken off the queue while asleep, not yet handed out
+        self.woken = []
+
+    def tick(self, busy=False):
+        """
+        Waits until the next frame should be drawn, at full rate if `busy`
+        is true. Returns the time since the last frame, in seconds.
+        """
+        if self.woken or pygame.event.peek():
+            self.active_time = ACTIVE_SECONDS
+
+        if busy or self.active_time > 0:
+            time_delta = self.clock.tick(self.frame_rate) / 1000.0
+            self.active_time -= time_delta
+            return time_delta
+
+        # idle: sleep until something happens, keeping the events that
+        # woke it for `events` (posting them back would put them after any
+        # that came in with them, so a click could come out up before down)
+        self.woken.extend(self.wait())
+        if self.woken:
+            self.active_time = ACTIVE_SECONDS
+        return min(self.clock.tick() / 1000.0, self.tick_time)
+
+    def wait(self):
+        """
+        Sleeps until there are events, or for `idle_frame_time` at most.
+        Returns the events taken off the queue, in the order they came.
+        """
+        if pygame.version.vernum[0] >= 2:
+            event = pygame.event.wait(self.idle_timeout)
+            if event.type == pygame.NOEVENT:
+                return []
+            return [event] + pygame.event.get()
+
+        waited = 0
+        while waited < self.idle_timeout:
+            events = pygame.event.get()
+            if events:
+                return events
+            waited += pygame.time.wait(IDLE_POLL_MS)
+        return []
+
+    def events(self):
+        """Returns every event since the last call, in the order they came."""
+        events = self.woken + pygame.event.get()
+        self.woken = []
+        return events
@@ -0,0 +1,188 @@
+import csv
+import json
+import time
+
+import numpy as np
+import pygame
+import pygame.freetype
+
+# the stages of a game loop frame, in the order they run
+STAGES = ['events', 'bot', 'rotation', 'background', 'ui', 'coins',
+          'blit_rotate', 'overlay', 'flip']
+
+# frame time the overlay's bars are drawn against, in milliseconds
+FRAME_BUDGET_MS = 1000 / 120
+
+OVERLAY_COLOR = (20, 20, 20, 190)
+TEXT_COLOR = (240, 240, 240)
+BAR_COLOR = (230, 160, 60)
+
+
+class FrameProfiler:
+    """
+    Records how long each stage of every game loop frame takes, for the
+    last `capacity` frames, in a ring buffer. Call `begin_frame()`, then
+    `mark(stage)` at the end of each stage, then `end_frame()`.
+
+    A disabled profiler returns straight away from every call, so it can
+    be left in the game loop.
+    """
+
+    def __init__(self, capacity=600, enabled=False, overlay=False,
+                 stages=STAGES):
+        """
+        Initialise an empty profiler for `capacity` frames. If `overlay` is
+        true, the timings are drawn over the screen by `draw_overlay`,
+        which needs them to be recorded, so `enabled` is then implied.
+        """
+        self.capacity = capacity
+        self.stages = list(stages)
+        self.stage_index = {stage: i for i, stage in enumerate(self.stages)}
+        self.overlay = overlay
+        self.enabled = enabled or overlay
+
+        # seconds spent in each stage, the whole frame's work, and the time
+        # since the previous frame started (which includes waiting)
+        self.stage_times = np.zeros((capacity, len(self.stages)))
+        self.frame_times = np.zeros(capacity)
+        self.intervals = np.zeros(capacity)
+
+        # frames recorded so far, the one being recorded goes in slot
+        # `count % capacity`
+        self.count = 0
+        self.frame_start = None
+        self.last_mark = None
+        self.row = None
+
+        self.font = None
+
+        # where the overlay was last drawn, None if it is hidden
+        self.overlay_rect = None
+
+    def toggle_overlay(self):
+        """Show the overlay if it is hidden, hide it otherwise."""
+        self.overlay = not self.overlay
+        self.enabled = self.enabled or self.overlay
+
+    def begin_frame(self):
+        """Start timing a new frame."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        slot = self.count % self.capacity
+        self.intervals[slot] = (
+            0.0 if self.frame_start is None else now - self.frame_start)
+        self.frame_start = self.last_mark = now
+        self.row = self.stage_times[slot]
+        self.row[:] = 0.0
+
+    def mark(self, stage):
+        """Adds the time since the last mark to `stage`."""
+        if not self.enabled or self.row is None:
+            return
+        now = time.perf_counter()
+        self.row[self.stage_index[stage]] += now - self.last_mark
+        self.last_mark = now
+
+    def end_frame(self):
+        """Finish timing the current frame."""
+        if not self.enabled or self.row is None:
+            return
+        self.frame_times[self.count % self.capacity] = (
+            time.perf_counter() - self.frame_start)
+        self.count += 1
+        self.row = None
+
+    def recorded(self):
+        """
+        Returns a tuple (intervals, frame_times, stage_times) of the frames
+        in the buffer, oldest first, in seconds.
+        """
+        n_frames = min(self.count, self.capacity)
+        order = (np.arange(n_frames) + self.count - n_frames) % self.capacity
+        return (self.intervals[order], self.frame_times[order],
+                self.stage_times[order])
+
+    def summary(self):
+        """Returns a dictionary of statistics for the frames in the buffer."""
+        intervals, frame_times, stage_times = self.recorded()
+        if not len(frame_times):
+            return {"frames": 0}
+
+        # the first frame has no previous one to measure from
+        intervals = intervals[intervals > 0]
+        fps = 1 / intervals.mean() if len(intervals) else 0.0
+
+        return {
+            "frames": len(frame_times),
+            "fps": fps,
+            "p50_ms": 1000 * np.percentile(frame_times, 50),
+            "p99_ms": 1000 * np.percentile(frame_times, 99),
+            "stage_mean_ms": {
+                stage: 1000 * stage_times[:, i].mean()
+                for i, stage in enumerate(self.stages)}
+        }
+
+    def draw_overlay(self, screen):
+        """Draw the frame rate, frame times and stage times onto `screen`."""
+        if not self.overlay:
+            self.overlay_rect = None
+            return
+        if self.font is None:
+            self.font = pygame.freetype.SysFont(name=None, size=12)
+
+        summary = self.summary()
+        if not summary["frames"]:
+            return
+
+        line_height = 16
+        bar_x = 90
+        bar_width = 120
+        height = line_height * (len(self.stages) + 1) + 8
+        panel = pygame.Surface((bar_x + bar_width + 70, height),
+                               pygame.SRCALPHA)
+        panel.fill(OVERLAY_COLOR)
+
+        self.font.render_to(
+            panel, (4, 4),
+            f"{summary['fps']:.0f} fps  p50 {summary['p50_ms']:.1f} ms  "
+            f"p99 {summary['p99_ms']:.1f} ms", TEXT_COLOR)
+
+        # one bar per stage, full width is the whole frame budget
+        for i, stage in enumerate(self.stages):
+            y = 4 + line_height * (i + 1)
+            stage_ms = summary["stage_mean_ms"][stage]
+            self.font.render_to(panel, (4, y), stage, TEXT_COLOR)
+            width = int(bar_width * min(1.0, stage_ms / FRAME_BUDGET_MS))
+            pygame.draw.rect(panel, BAR_COLOR,
+                             (bar_x, y, max(1, width), line_height - 6))
+            self.font.render_to(panel, (bar_x + bar_width + 6, y),
+                                f"{stage_ms:.2f}", TEXT_COLOR)
+
+        self.overlay_rect = screen.blit(panel, (4, 4))
+
+    def export(self, path):
+        """
+        Writes the frames in the buffer to `path`, as CSV if it ends in
+        .csv, JSON otherwise. Times are in milliseconds.
+        """
+        intervals, frame_times, stage_times = self.recorded()
+
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as export_file:
+                writer = csv.writer(export_file)
+                writer.writerow(['frame', 'interval', 'total'] + self.stages)
+                for i in range(len(frame_times)):
+                    writer.writerow(
+                        [i, f"{1000 * intervals[i]:.4f}",
+                         f"{1000 * frame_times[i]:.4f}"] +
+                        [f"{1000 * t:.4f}" for t in stage_times[i]])
+        else:
+            with open(path, 'w') as export_file:
+                json.dump({
+                    "summary": self.summary(),
+                    "stages": self.stages,
+                    "interval_ms": (1000 * intervals).tolist(),
+                    "total_ms": (1000 * frame_times).tolist(),
+                    "stage_ms": (1000 * stage_times).tolist()
+                }, export_file, indent=4)
@@ -0,0 +1,197 @@
+"""
+Game records: a compact log of the moves of a game, and replaying them
+without pygame. Archives of many records can be scanned with, for example:
+
+    python record.py games.c4r
+    python record.py games.c4r --game 12 --ply 20
+
+A record is a header (the board size and number of coins to connect at the
+start, and the number of moves) followed by one byte per move: the column
+a coin was dropped in, or a rotation (-1, -2 or -3, as in `GameState`) as
+an int8. An archive is records one after another in a file.
+
+Replaying a record plays its moves on a `Bitboard` with no win checks,
+animations or sprites, so any position of a game is found in the time it
+takes to drop its coins.
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from bitboard import Bitboard
+from gamestate import GameState, ROTATION_ANGLES
+
+# magic bytes, then n_rows, n_cols, connect_num and the number of moves
+HEADER = struct.Struct('<2sBBBI')
+MAGIC = b'C4'
+
+
+class GameRecord:
+    """Class representing the moves of one game, from an empty board."""
+
+    def __init__(self, n_rows, n_cols, connect_num, moves=b''):
+        """Initialise a record of `moves`, a bytes of int8 moves."""
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.connect_num = connect_num
+        self.moves = bytes(moves)
+
+    @classmethod
+    def from_moves(cls, n_rows, n_cols, connect_num, moves):
+        """Returns a record of `moves`, a list of column or rotation moves."""
+        return cls(n_rows, n_cols, connect_num,
+                   np.array(moves, dtype=np.int8).tobytes())
+
+    @classmethod
+    def from_game_state(cls, game_state):
+        """Returns a record of every move played in `game_state`."""
+        moves = [move for move, _ in game_state.history]
+
+        # the board was the other way round at the start if it has been
+        # turned by 90 degrees an odd number of times
+        quarter_turns = sum(1 for move in moves
+                            if move in ROTATION_ANGLES and
+                            ROTATION_ANGLES[move] != 180)
+        n_rows, n_cols = game_state.n_rows, game_state.n_cols
+        if quarter_turns % 2:
+            n_rows, n_cols = n_cols, n_rows
+
+        return cls.from_moves(n_rows, n_cols, game_state.connect_num, moves)
+
+    @classmethod
+    def unpack_from(cls, buffer, offset=0):
+        """
+        Reads the record at `offset` in `buffer`. Returns the record and the
+        offset of whatever comes after it.
+        """
+        magic, n_rows, n_cols, connect_num, n_moves = \
+            HEADER.unpack_from(buffer, offset)
+        if magic != MAGIC:
+            raise ValueError(f"no game record at offset {offset}")
+
+        start = offset + HEADER.size
+        moves = buffer[start:start + n_moves]
+        return cls(n_rows, n_cols, connect_num, moves), start + n_moves
+
+    def __len__(self):
+        return len(self.moves)
+
+    def move_list(self):
+        """Returns the moves as a list of ints."""
+        return np.frombuffer(self.moves, dtype=np.int8).tolist()
+
+    def to_bytes(self):
+        """Returns the record as it is written to a file."""
+        return HEADER.pack(MAGIC, self.n_rows, self.n_cols,
+                           self.connect_num, len(self.moves)) + self.moves
+
+    def bitboard(self, ply=None):
+        """
+        Returns the coins on the board after the first `ply` moves (all of
+        them if None) as a `Bitboard`, and the player to move next.
+        """
+        bitboard = Bitboard(self.n_rows, self.n_cols)
+        player = 1
+        for move in self.move_list()[:ply]:
+            if move in ROTATION_ANGLES:
+                bitboard = bitboard.rotate(ROTATION_ANGLES[move])
+            elif bitboard.drop(move, player) is None:
+                raise ValueError(f"column {move} is full or off the board")
+            player = 3 - player
+        return bitboard, player
+
+    def grid(self, ply=None):
+        """
+        Returns the board after the first `ply` moves (all of them if None),
+        in the same layout as `GameState.grid`.
+        """
+        bitboard, _ = self.bitboard(ply)
+        return bitboard.to_grid()
+
+    def winner(self):
+        """
+        Returns the player who won the game (whoever made the last move, if
+        it made a line), or None if nobody did.
+        """
+        if not self.moves:
+            return None
+        bitboard, player = self.bitboard()
+        if bitboard.has_connection(self.connect_num):
+            return 3 - player
+        return None
+
+    def game_state(self, ply=None):
+        """
+        Returns a `GameState` after the first `ply` moves (all of them if
+        None), with the rules checked on every move, so it can be played on.
+        """
+        game_state = GameState(self.n_rows, self.n_cols, self.connect_num)
+        for move in self.move_list()[:ply]:
+            game_state.play(move)
+        return game_state
+
+
+def iter_records(buffer):
+    """Yields every record in `buffer`, the contents of an archive."""
+    offset = 0
+    while offset < len(buffer):
+        record, offset = GameRecord.unpack_from(buffer, offset)
+        yield record
+
+
+def read_records(path):
+    """
+    Yields every record in the archive at `path`. The file is memory-mapped,
+    so only the parts of it that are used are read.
+    """
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, 'rb') as archive:
+        with mmap.mmap(archive.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from iter_records(data)
+
+
+def write_records(path, records, append=True):
+    """Writes `records` to the archive at `path`, after any already in it."""
+    with open(path, 'ab' if append else 'wb') as archive:
+        for record in records:
+            archive.write(record.to_bytes())
+
+
+def main():
+    """Scans an archive of game records from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('path')
+    parser.add_argument('--game', type=int, default=None,
+                        help="print the board of this game (from 0)")
+    parser.add_argument('--ply', type=int, default=None,
+                        help="print the board after this many moves")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n_games = n_moves = 0
+    wins = {None: 0, 1: 0, 2: 0}
+    for number, record in enumerate(read_records(args.path)):
+        if number == args.game:
+            print(f"game {number}: {record.n_rows}x{record.n_cols}, "
+                  f"connect {record.connect_num}, {len(record)} moves")
+            print(record.grid(args.ply))
+            return
+
+        n_games += 1
+        n_moves += len(record)
+        wins[record.winner()] += 1
+
+    elapsed = time.perf_counter() - start
+    print(f"{n_games} games, {n_moves} moves, in {elapsed:.2f} s")
+    print(f"  Blue won {wins[1]}, Red won {wins[2]}, "
+          f"no winner in {wins[None]}")
+
+
+# only run main() if this python module is the one being run
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Headless renderer: plays a scripted list of moves in a game, without a
+display or sound card, as fast as it can be drawn, and saves every frame.
+For example:
+
+    python render.py 3 3 4 cw 2 --frames replay/
+    python render.py 3 3 4 cw 2 --raw - | ffmpeg -f rawvideo -pix_fmt rgb24
+        -s 850x510 -r 60 -i - replay.mp4
+
+Moves are column numbers to drop a coin in, or 'cw', 'acw' and 'flip' to
+turn the board clockwise, anticlockwise or by 180 degrees. Frames are
+either a numbered PNG sequence, or one stream of raw 24-bit RGB frames (to
+a file, or to stdout with '-'). The size of each frame is printed at the
+start, and stays the same for the whole game, even if the board turns.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+# no window or sound card needed, unless one was asked for
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+# pygame's greeting would end up in a stream of frames on stdout
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from game import Game
+from gamestate import ROTATE_CLOCKWISE, ROTATE_ANTICLOCKWISE, ROTATE_180
+from music import Music
+from settings import Settings
+
+MOVE_NAMES = {
+    'cw': ROTATE_CLOCKWISE,
+    'acw': ROTATE_ANTICLOCKWISE,
+    'flip': ROTATE_180
+}
+
+
+def parse_move(text):
+    """Returns the move named `text`: a column number, or a rotation."""
+    if text in MOVE_NAMES:
+        return MOVE_NAMES[text]
+    try:
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"'{text}' is not a column or one of {', '.join(MOVE_NAMES)}")
+
+
+def image_to_bytes(surface, pixel_format):
+    """
+    Returns the pixels of `surface` as bytes in `pixel_format`, such as
+    'RGB'. pygame.image.tobytes is only in pygame 2.1.3 and later, before
+    which it was called tostring.
+    """
+    if hasattr(pygame.image, 'tobytes'):
+        return pygame.image.tobytes(surface, pixel_format)
+    return pygame.image.tostring(surface, pixel_format)
+
+
+class FrameWriter:
+    """
+    Writes frames of the screen to `path`: as numbered PNG files if it is a
+    directory, or else as raw RGB frames ('-' is stdout). Every frame is
+    drawn on a canvas of `size`, so frames of a board that turned (and
+    changed the screen's shape) can still be streamed to an encoder.
+    """
+
+    def __init__(self, path, size, raw=False):
+        self.path = path
+        self.raw = raw
+        self.canvas = pygame.Surface(size)
+        self.count = 0
+
+        if not raw:
+            os.makedirs(path, exist_ok=True)
+            self.stream = None
+        elif path == '-':
+            self.stream = sys.stdout.buffer
+        else:
+            self.stream = open(path, 'wb')
+
+    def write(self, screen):
+        """Write the screen's current contents as the next frame."""
+        canvas = self.canvas
+        canvas.fill((0, 0, 0))
+        canvas.blit(screen, (0, 0))
+
+        if self.raw:
+            self.stream.write(image_to_bytes(canvas, 'RGB'))
+        else:
+            pygame.image.save(canvas, os.path.join(
+                self.path, f"frame_{self.count:06d}.png"))
+        self.count += 1
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.flush()
+            if self.stream is not sys.stdout.buffer:
+                self.stream.close()
+
+
+def canvas_size(settings):
+    """
+    Returns the size of a screen big enough for the board in `settings`
+    either way round.
+    """
+    length = max(settings.n_rows, settings.n_cols) * settings.coin_length
+    return (length + settings.padding_right, length + settings.padding_y)
+
+
+def render(settings, moves, writer, fps=60, move_frames=30):
+    """
+    Plays `moves` in a new sandbox game (both players are scripted),
+    writing every frame to `writer` as if the game ran at `fps`. The next
+    move is played once nothing is moving any more and at least
+    `move_frames` frames have passed since the last one. Returns the
+    number of frames drawn.
+    """
+    screen = pygame.display.set_mode(settings.screen_size)
+    game = Game(settings, screen, Music(settings), pygame.time.Clock())
+
+    moves = list(moves)
+    time_delta = 1 / fps
+    wait = move_frames
+    frames = 0
+    while game.is_running:
+        # the frame is drawn as soon as it can be, never waiting for a clock
+        game.run_frame(time_delta)
+        writer.write(game.screen)
+        frames += 1
+        wait -= 1
+
+        settled = (game.handling_events and not game.is_rotating and
+                   not game.coins_falling)
+        if not settled or wait > 0:
+            continue
+        if not moves:
+            # the script ran out before anyone won
+            break
+        game.handling_events = game.play_move(moves.pop(0))
+        wait = move_frames
+
+    return frames
+
+
+def main():
+    """Renders a scripted game from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('moves', type=parse_move, nargs='*',
+                        help="columns, or 'cw', 'acw' or 'flip'")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('--frames', metavar='DIR',
+                        help="save a PNG file per frame in DIR")
+    output.add_argument('--raw', metavar='PATH',
+                        help="write raw RGB frames to PATH ('-' for stdout)")
+    parser.add_argument('--rows', type=int, default=7)
+    parser.add_argument('--cols', type=int, default=7)
+    parser.add_argument('--connect', type=int, default=4)
+    parser.add_argument('--fps', type=int, default=60,
+                        help="frame rate the game is rendered at")
+    parser.add_argument('--move-frames', type=int, default=30,
+                        help="frames to wait between moves")
+    args = parser.parse_args()
+
+    settings = Settings()
+    settings.set_board_size(n_rows=args.rows, n_cols=args.cols)
+    settings.connect_num = args.connect
+
+    pygame.init()
+    pygame.mixer.init()
+    size = canvas_size(settings)
+    raw = args.raw is not None
+    writer = FrameWriter(args.raw if raw else args.frames, size, raw)
+
+    # the game prints what happens in it, which mustn't end up in a raw
+    # stream on stdout
+    log = sys.stderr if raw else sys.stdout
+    print(f"rendering {len(args.moves)} moves at {size[0]}x{size[1]}, "
+          f"{args.fps} fps", file=log)
+
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(log):
+            frames = render(settings, args.moves, writer, args.fps,
+                            args.move_frames)
+    finally:
+        writer.close()
+    seconds = time.perf_counter() - start
+    print(f"rendered {frames} frames in {seconds:.2f} s "
+          f"({frames / seconds:.0f} fps)", file=log)
+
+
+# only run main() if this python module is the one being run
+if __name__ == "__main__":
+    main()
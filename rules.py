@@ -0,0 +1,130 @@
+import numpy as np
+
+# the four directions a line of coins can go in, as (row, col) steps:
+# horizontal, vertical, down-right diagonal and up-right diagonal
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (-1, 1))
+
+
+def connects_through(grid, row, col, connect_num):
+    """
+    Returns true if the coin at (`row`, `col`) in `grid` is part of a line
+    of at least `connect_num` coins of the same player.
+
+    Only looks at the up to `connect_num - 1` cells on either side of
+    (`row`, `col`) in each direction, so the cost doesn't depend on how
+    big the board is.
+    """
+    player = grid[row][col]
+    if player == 0:
+        return False
+
+    n_rows, n_cols = grid.shape
+    for d_row, d_col in DIRECTIONS:
+        count = 1
+
+        # walk forwards then backwards from (row, col), while the coins match
+        for sign in (1, -1):
+            r = row + sign * d_row
+            c = col + sign * d_col
+            while (count < connect_num and 0 <= r < n_rows and
+                    0 <= c < n_cols and grid[r][c] == player):
+                count += 1
+                r += sign * d_row
+                c += sign * d_col
+
+        if count >= connect_num:
+            return True
+
+    return False
+
+
+def connects_through_any(grid, cells, connect_num):
+    """
+    Returns true if any of the coins at the (row, col) positions in `cells`
+    is part of a line of at least `connect_num` coins.
+    """
+    return any(connects_through(grid, row, col, connect_num)
+               for row, col in cells)
+
+
+def find_connections(grid, connect_num):
+    """
+    Checks the whole of `grid` for lines of `connect_num` coins, in all
+    four directions at once with whole-array operations. Works for boards
+    of any shape.
+
+    Returns a tuple (winners, cells): `winners` maps each player to true
+    if they have a line, and `cells` is a boolean array the shape of
+    `grid` which is true for every coin that is part of a line.
+    """
+    grid = np.asarray(grid)
+    winners = {}
+    cells = np.zeros(grid.shape, dtype=bool)
+
+    for player in (1, 2):
+        coins = grid == player
+        winners[player] = False
+
+        for d_row, d_col in DIRECTIONS:
+            starts = line_starts(coins, d_row, d_col, connect_num)
+            if not starts.any():
+                continue
+            winners[player] = True
+
+            # mark every cell of each line, from where it starts
+            for i in range(connect_num):
+                cells |= shift(starts, -i * d_row, -i * d_col)
+
+    return winners, cells
+
+
+def line_starts(coins, d_row, d_col, connect_num):
+    """
+    Returns a boolean array that is true at every (row, col) where a line
+    of `connect_num` true values in `coins` starts, going in direction
+    (`d_row`, `d_col`). Only the last two axes of `coins` are the board,
+    so a stack of boards can be checked at once.
+    """
+    starts = coins.copy()
+    for i in range(1, connect_num):
+        starts &= shift(coins, i * d_row, i * d_col)
+    return starts
+
+
+def shift(mask, d_row, d_col):
+    """
+    Returns a boolean array `shifted` the same shape as `mask` where
+    `shifted[..., row, col]` is `mask[..., row + d_row, col + d_col]`, or
+    false if that is off the board.
+    """
+    n_rows, n_cols = mask.shape[-2:]
+    shifted = np.zeros(mask.shape, dtype=bool)
+    if abs(d_row) >= n_rows or abs(d_col) >= n_cols:
+        return shifted
+
+    shifted[..., max(0, -d_row):n_rows - max(0, d_row),
+            max(0, -d_col):n_cols - max(0, d_col)] = \
+        mask[..., max(0, d_row):n_rows - max(0, -d_row),
+             max(0, d_col):n_cols - max(0, -d_col)]
+    return shifted
+
+
+def settle(grid):
+    """
+    Lets the coins in `grid` fall to the bottom of their columns, keeping
+    their order. Returns the settled grid, then the (row, col) cells the
+    coins were at and the cells they land on, as two (n, 2) arrays in
+    the same order.
+    """
+    occupied = grid != 0
+
+    # a coin lands as many rows from the bottom as there are coins at or
+    # below it in its column
+    below = np.cumsum(occupied[::-1], axis=0)[::-1]
+    rows, cols = np.nonzero(occupied)
+    landing_rows = grid.shape[0] - below[rows, cols]
+
+    settled = np.zeros_like(grid)
+    settled[landing_rows, cols] = grid[rows, cols]
+    return (settled, np.column_stack((rows, cols)),
+            np.column_stack((landing_rows, cols)))
@@ -0,0 +1,53 @@
+import heapq
+import itertools
+
+
+class Scheduler:
+    """
+    Class running actions at set times, driven from an event loop: call
+    `update(time_delta)` every frame (or tick) and every action that has
+    come due is run, in order, without blocking the loop in between.
+    """
+
+    def __init__(self):
+        """Initialise a scheduler with nothing to do, at time 0."""
+        self.time = 0.0
+
+        # (due time, order scheduled, action, arguments), soonest first;
+        # the order keeps actions due at the same time in the order they
+        # were scheduled. Cancelled actions stay in the queue until they
+        # come due, but only the handles in `waiting` are run
+        self.queue = []
+        self.counter = itertools.count()
+        self.waiting = set()
+
+    def after(self, delay, action, *args):
+        """
+        Run `action(*args)` `delay` seconds from now. Returns a handle to
+        pass to `cancel`.
+        """
+        handle = next(self.counter)
+        heapq.heappush(self.queue, (self.time + delay, handle, action, args))
+        self.waiting.add(handle)
+        return handle
+
+    def cancel(self, handle):
+        """
+        Don't run the action `handle`. Does nothing if it has already run or
+        been cancelled, or is None.
+        """
+        self.waiting.discard(handle)
+
+    def pending(self):
+        """Returns true if any action is still to be run."""
+        return bool(self.waiting)
+
+    def update(self, time_delta):
+        """Move the time on by `time_delta` seconds, running due actions."""
+        self.time += time_delta
+        queue = self.queue
+        while queue and queue[0][0] <= self.time:
+            _, handle, action, args = heapq.heappop(queue)
+            if handle in self.waiting:
+                self.waiting.discard(handle)
+                action(*args)
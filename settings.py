@@ -30,6 +30,7 @@ class Settings:
         self.sound_path = {
             "bell": os.path.join('assets', 'bell.wav'),
             "plate": os.path.join('assets', 'plate.wav'),
+            "coin_drop": os.path.join('assets', 'plate.wav'),
             "door_close": os.path.join('assets', 'door_close.wav'),
             "door_open": os.path.join('assets', 'door_open.wav')
         }
@@ -41,11 +42,54 @@ class Settings:
         self.n_cols = 7
         self.board_size = (
             self.n_cols * self.coin_length, self.n_rows * self.coin_length)
-        self.coin_fall_speed = 10
+
+        # coins start falling at `coin_start_speed` and speed up by
+        # `coin_gravity`, in pixels per second (per second)
+        self.coin_start_speed = 300
+        self.coin_gravity = 6000
 
         # how many coins a player needs to connect to win
         self.connect_num = 4
 
+        # how far ahead the 'ai_hard' bot searches, in moves, and how many
+        # positions or seconds it may use before settling for a shallower
+        # search (None for no limit)
+        self.ai_depth = 6
+        self.ai_node_budget = None
+        self.ai_time_limit = 0.6
+
+        # memory the 'ai_hard' bot may use to remember searched positions
+        self.ai_table_bytes = 16 * 1024 * 1024
+
+        # precomputed best opening moves, built by opening_book.py
+        self.opening_book_path = os.path.join('assets', 'opening_book.bin')
+
+        # every game played is added to this archive of game records (see
+        # record.py), if it is set
+        self.record_path = None
+
+        # the game advances `tick_rate` times a second, whatever rate
+        # frames are drawn at, up to `frame_rate` a second (0 for no limit)
+        self.tick_rate = 120
+        self.frame_rate = 120
+
+        # while nothing on screen is changing, a frame is drawn at least
+        # every `idle_frame_time` seconds, or as soon as there is an event
+        self.idle_frame_time = 0.5
+
+        # only redraw and update the parts of the screen that changed each
+        # frame, instead of the whole window, for slow machines
+        self.dirty_rendering = False
+
+        # per-frame stage timings of the game loop, kept for the last
+        # `profile_capacity` frames: recorded if `profile_frames` is true,
+        # drawn over the game if `profile_overlay` is (F3 toggles it), and
+        # saved to `profile_path` (.csv or .json) when the game ends
+        self.profile_frames = False
+        self.profile_overlay = False
+        self.profile_path = None
+        self.profile_capacity = 600
+
         # screen settings: size is based on the board + background
         self.padding_right = 500
         self.padding_left = 50
@@ -56,6 +100,22 @@ class Settings:
             self.n_rows * self.coin_length + self.padding_y)
         self.bg_color = (230, 230, 230)
 
+    def image_sizes(self):
+        """
+        Returns (path, size) for every image the game uses, the ones the
+        menu needs first, where size is what it gets scaled to, or None if
+        it is used at its original size.
+        """
+        return [(self.background_main_image_path, self.screen_size),
+                (self.title_image_path, None),
+                (self.background_dark_image_path, self.screen_size),
+                (self.tutorial_image_path, None),
+                (self.background_image_path, self.screen_size),
+                *[(path, self.cell_size)
+                  for path in self.tile_image_paths.values()],
+                *[(path, self.cell_size)
+                  for path in self.coin_image_paths.values()]]
+
     def set_board_size(self, n_rows, n_cols, adjust=True):
         """
         Sets the board size to `n_rows` x `n_cols`,
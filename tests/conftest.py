@@ -0,0 +1,24 @@
+import os
+import sys
+
+# the game's modules are at the top of the repository, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# no window or sound card needed
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+import pytest
+
+from settings import Settings
+
+
+@pytest.fixture
+def settings():
+    """Returns the default settings, with a display of their screen size."""
+    pygame.init()
+    settings = Settings()
+    pygame.display.set_mode(settings.screen_size)
+    pygame.event.get()
+    return settings
@@ -0,0 +1,36 @@
+"""Random games, for checking the rules engines against each other."""
+import random
+
+from gamestate import GameState
+
+# board sizes (n_rows, n_cols, connect_num) the random games are played on
+SIZES = [(7, 7, 4), (6, 7, 4), (4, 8, 3), (8, 5, 5), (6, 6, 4)]
+
+N_GAMES = 300
+
+
+def random_games(n_games=N_GAMES, seed=0):
+    """
+    Yields `n_games` random finished games as (game_state, snapshots),
+    where `snapshots[i]` is the position before move `i`.
+    """
+    rng = random.Random(seed)
+    for i in range(n_games):
+        game_state = GameState(*SIZES[i % len(SIZES)])
+        snapshots = []
+        while not game_state.is_over():
+            snapshots.append(snapshot(game_state))
+            game_state.play(rng.choice(game_state.legal_moves()))
+        yield game_state, snapshots
+
+
+def snapshot(game_state):
+    """
+    Returns everything `undo` has to put back, as a tuple: the grid as
+    lists, the bitboard's bits, heights, n_rows and n_cols, the player to
+    move and the winner.
+    """
+    bitboard = game_state.bitboard
+    return (game_state.grid.tolist(), bitboard.bits[:], bitboard.heights[:],
+            bitboard.n_rows, bitboard.n_cols, game_state.player,
+            game_state.winner)
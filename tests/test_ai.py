@@ -0,0 +1,82 @@
+import random
+
+import numpy as np
+
+from ai import NegamaxBot
+from evaluate import (MAX_HEURISTIC, WIN_SCORE, evaluate_boards,
+                      next_boards, quarter_turn_boards)
+from gamestate import (GameState, ROTATE_180, ROTATE_ANTICLOCKWISE,
+                       ROTATE_CLOCKWISE, ROTATIONS)
+
+
+def winning_moves(game_state):
+    """Returns the moves that win straight away in `game_state`."""
+    wins = []
+    for move in game_state.legal_moves():
+        state = game_state.copy()
+        state.play(move)
+        if state.winner is not None:
+            wins.append(move)
+    return wins
+
+
+def test_next_boards_turn_non_square_boards():
+    game_state = GameState(6, 7, 4)
+    for move in (3, 3, 4, 2):
+        game_state.play(move)
+
+    moves, grids = next_boards(game_state.grid, game_state.player)
+    assert moves == list(range(7)) + [ROTATE_180]
+    turn_moves, turned = quarter_turn_boards(game_state.grid)
+    assert turn_moves == [ROTATE_CLOCKWISE, ROTATE_ANTICLOCKWISE]
+    assert turned.shape == (2, 7, 6)
+
+    for move, grid in zip(moves + turn_moves, list(grids) + list(turned)):
+        state = game_state.copy()
+        state.play(move)
+        assert np.array_equal(grid, state.grid)
+
+    # square boards have every rotation in `next_boards`
+    square = GameState(7, 7, 4)
+    assert next_boards(square.grid, 1)[0][-3:] == list(ROTATIONS)
+    assert quarter_turn_boards(square.grid)[0] == []
+
+
+def test_no_move_when_the_game_is_over():
+    game_state = GameState(6, 7, 4)
+    game_state.bitboard.heights = [6] * 7
+    game_state.grid[:] = 1
+    assert game_state.is_over()
+    assert NegamaxBot(2).best_move(game_state) is None
+
+
+def test_finds_winning_rotations_on_non_square_boards():
+    rng = random.Random(0)
+    bot = NegamaxBot(2)
+    found = 0
+    while found < 5:
+        game_state = GameState(6, 7, 4)
+        while not game_state.is_over():
+            wins = winning_moves(game_state)
+            if wins and all(move in ROTATIONS for move in wins):
+                # only a rotation wins: the bot has to see it
+                assert bot.best_move(game_state) in wins
+                found += 1
+                break
+            game_state.play(rng.choice(game_state.legal_moves()))
+
+
+def test_heuristic_stays_below_a_win():
+    # runs of 15 coins in every other row of a connect 16 board: each is
+    # worth 4 ** 15, more than `WIN_SCORE`, before scaling
+    grid = np.zeros((40, 40), dtype=np.int8)
+    grid[::2, :] = np.where(np.arange(40) % 16 < 15, 1, 0)
+    wins, scores = evaluate_boards(grid[np.newaxis], 16, 1)
+    assert not wins.any()
+    assert 0 < scores[0] <= MAX_HEURISTIC < WIN_SCORE
+
+    # and a win still outscores it
+    won = grid.copy()
+    won[1, :16] = 1
+    wins, scores = evaluate_boards(np.stack((grid, won)), 16, 1)
+    assert scores[1] == WIN_SCORE > scores[0]
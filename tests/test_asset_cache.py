@@ -0,0 +1,59 @@
+import pygame
+
+from asset_cache import AssetCache
+
+
+def save_image(tmp_path, name, size=(64, 48), alpha=True):
+    """Saves a test image of `size` and returns its path."""
+    surface = pygame.Surface(size, pygame.SRCALPHA if alpha else 0)
+    surface.fill((200, 100, 50, 128 if alpha else 255))
+    path = str(tmp_path / name)
+    pygame.image.save(surface, path)
+    return path
+
+
+def test_preload_scales_in_the_background(settings, tmp_path):
+    cache = AssetCache()
+    coin = save_image(tmp_path, 'coin.png')
+    title = save_image(tmp_path, 'title.png', alpha=False)
+    cache.preload([(coin, (10, 10)), (coin, (20.0, 30.0)), (title, None)])
+
+    small = cache.scaled_image(coin, (10, 10))
+    large = cache.scaled_image(coin, (20, 30))
+    assert small.get_size() == (10, 10)
+    assert large.get_size() == (20, 30)
+    assert small.get_flags() & pygame.SRCALPHA
+
+    # the original was only ever decoded, in the background
+    assert cache.loads == 0
+    assert cache.scaled_image(coin, (10, 10)) is small
+    assert cache.stats()["hits"] == 1
+
+    # converting the original later keeps the scaled copies
+    assert cache.image(coin).get_size() == (64, 48)
+    assert cache.scaled_image(coin, (20, 30)) is large
+    assert cache.image(title).get_size() == (64, 48)
+    assert cache.loads == 2
+
+
+def test_scaled_without_preload(settings, tmp_path):
+    cache = AssetCache()
+    board = save_image(tmp_path, 'board.png', alpha=False)
+    surface = cache.scaled_image(board, (5, 6))
+    assert surface.get_size() == (5, 6)
+    assert cache.scaled_image(board, (5, 6)) is surface
+    assert cache.stats() == {"images": 1, "loads": 1, "scaled": 1,
+                             "scaled_bytes": 5 * 6 * surface.get_bytesize(),
+                             "hits": 1, "misses": 1}
+
+
+def test_least_recently_used_dropped(settings, tmp_path):
+    path = save_image(tmp_path, 'tile.png', alpha=False)
+    cache = AssetCache(max_bytes=(10 + 12) * 10 * 4)
+    cache.preload([(path, (10, 10)), (path, (11, 10))])
+    cache.scaled_image(path, (10, 10))
+    cache.scaled_image(path, (11, 10))
+    cache.scaled_image(path, (10, 10))
+    cache.scaled_image(path, (12, 10))
+    assert list(cache.scaled) == [(path, (10, 10)), (path, (12, 10))]
+    assert (path, (11, 10)) not in cache.converted
@@ -0,0 +1,42 @@
+import numpy as np
+
+from bitboard import Bitboard
+from gamestate import ROTATION_ANGLES
+from rules import find_connections, settle
+
+from random_games import random_games
+
+
+def rotated_grid(grid, angle):
+    """Returns `grid` rotated by `angle` degrees, as `GameState.rotate`."""
+    if angle == -90:
+        return np.rot90(grid, k=1, axes=(1, 0))
+    elif angle == 90:
+        return np.rot90(grid, k=1, axes=(0, 1))
+    return np.rot90(grid, k=2, axes=(0, 1))
+
+
+def test_grid_round_trip():
+    for game_state, _ in random_games(50):
+        bitboard = Bitboard.from_grid(game_state.grid)
+        assert bitboard.bits == game_state.bitboard.bits
+        assert bitboard.heights == game_state.bitboard.heights
+        assert np.array_equal(bitboard.to_grid(), game_state.grid)
+
+
+def test_rotate_matches_rot90_and_settle():
+    for game_state, _ in random_games():
+        for angle in ROTATION_ANGLES.values():
+            rotated = game_state.bitboard.rotate(angle)
+            settled, _, _ = settle(rotated_grid(game_state.grid, angle))
+            assert np.array_equal(rotated.to_grid(), settled)
+
+
+def test_has_line_matches_find_connections():
+    for game_state, _ in random_games():
+        bitboard = game_state.bitboard
+        winners, _ = find_connections(game_state.grid,
+                                      game_state.connect_num)
+        for player in (1, 2):
+            assert (bitboard.has_won(player, game_state.connect_num) ==
+                    winners[player])
@@ -0,0 +1,59 @@
+
+import pygame
+import pytest
+
+from ai import BotWorker
+from game import Game
+from gamestate import GameState, ROTATE_180
+from music import Music
+
+
+class BrokenBot:
+    """Bot whose search always fails."""
+
+    def best_move(self, game_state, stop_event=None):
+        raise IndexError("no moves")
+
+
+class SlowBot:
+    """Bot that plays column 0 once it is told to stop."""
+
+    def best_move(self, game_state, stop_event=None):
+        stop_event.wait()
+        return 0
+
+
+def new_game(settings, game_mode='sandbox'):
+    screen = pygame.display.get_surface()
+    return Game(settings, screen, Music(settings), pygame.time.Clock(),
+                game_mode)
+
+
+def test_worker_raises_search_errors_from_result():
+    worker = BotWorker(BrokenBot())
+    worker.start(GameState())
+    worker.thread.join()
+    assert worker.done()
+    with pytest.raises(IndexError):
+        worker.result()
+    assert not worker.is_busy()
+
+
+def test_worker_throws_cancelled_results_away():
+    worker = BotWorker(SlowBot())
+    worker.start(GameState())
+    assert worker.is_busy() and not worker.done()
+    worker.cancel()
+    assert not worker.is_busy()
+    assert worker.move is None
+
+
+def test_play_move_rejects_illegal_moves(settings):
+    game = new_game(settings)
+    for move in (None, -7, settings.n_cols):
+        with pytest.raises(ValueError):
+            game.play_move(move)
+
+    assert game.play_move(3)
+    assert game.play_move(ROTATE_180)
+    assert game.is_rotating
@@ -0,0 +1,50 @@
+import pytest
+
+from gamestate import GameState, ROTATE_180, ROTATIONS
+from rules import find_connections
+
+from random_games import random_games, snapshot
+
+
+def test_incremental_wins_match_whole_board():
+    for game_state, snapshots in random_games():
+        # replay the game, checking the whole board after every move
+        n_rows, n_cols = snapshots[0][3:5]
+        replay = GameState(n_rows, n_cols, game_state.connect_num)
+        for move, _ in game_state.history:
+            replay.play(move)
+            winners, _ = find_connections(replay.grid, replay.connect_num)
+            assert (replay.winner is not None) == any(winners.values())
+        assert replay.winner == game_state.winner
+
+
+def test_undo_restores_every_position():
+    for game_state, snapshots in random_games():
+        for before in reversed(snapshots):
+            game_state.undo()
+            assert snapshot(game_state) == before
+        assert not game_state.history
+
+
+def test_copies_are_independent():
+    game_state = GameState(6, 7, 4)
+    for move in (3, 3, ROTATE_180, 2):
+        game_state.play(move)
+    before = snapshot(game_state)
+
+    copy = game_state.copy()
+    copy.play(4)
+    copy.undo()
+    copy.undo()
+    assert snapshot(game_state) == before
+
+
+def test_legal_moves():
+    game_state = GameState(2, 3, 4)
+    assert game_state.legal_moves() == [0, 1, 2, *ROTATIONS]
+
+    for move in (0, 0, 1):
+        game_state.play(move)
+    assert game_state.legal_moves() == [1, 2, *ROTATIONS]
+    with pytest.raises(ValueError):
+        game_state.play(0)
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from gamestate import GameState
+from opening_book import OpeningBook, build_book, write_book
+from transposition import canonical_hash, mirror_move
+
+
+def positions(n_rows, n_cols, connect_num, plies):
+    """
+    Returns (state, moves) for every position reached by dropping fewer
+    than `plies` coins from the start.
+    """
+    frontier = [(GameState(n_rows, n_cols, connect_num), [])]
+    found = []
+    for _ in range(plies):
+        found.extend(frontier)
+        frontier = [(play(state, col), moves + [col])
+                    for state, moves in frontier for col in range(n_cols)]
+    return found
+
+
+def play(state, move):
+    played = state.copy()
+    played.play(move)
+    return played
+
+
+def book_move(entries, state):
+    """Returns the move `entries` holds for `state`, in its orientation."""
+    key, mirrored = canonical_hash(state.grid, state.player)
+    move = entries[key]
+    return mirror_move(move, state.n_cols) if mirrored else move
+
+
+def test_write_and_look_up(tmp_path):
+    entries = build_book(4, 5, 3, plies=2, depth=1, log=lambda text: None)
+    path = tmp_path / 'book.bin'
+    write_book(path, entries, 4, 5, 3)
+    book = OpeningBook(path)
+    assert len(book) == len(entries)
+
+    for state, moves in positions(4, 5, 3, 2):
+        move = book_move(entries, state)
+        assert move in state.legal_moves()
+        assert book.lookup(state) == move
+
+        # the mirror image of a position gets the mirrored move
+        mirror = GameState(4, 5, 3)
+        for col in moves:
+            mirror.play(mirror_move(col, 5))
+        assert np.array_equal(mirror.grid, state.grid[:, ::-1])
+        assert book.lookup(mirror) == mirror_move(move, 5)
+
+
+def test_missing_positions(tmp_path):
+    entries = build_book(4, 5, 3, plies=1, depth=1, log=lambda text: None)
+    path = tmp_path / 'book.bin'
+    write_book(path, entries, 4, 5, 3)
+    book = OpeningBook(path)
+
+    assert book.lookup(play(play(GameState(4, 5, 3), 0), 1)) is None
+    assert book.lookup(GameState(5, 5, 3)) is None
+    assert book.lookup(GameState(4, 5, 4)) is None
+
+
+def test_colliding_keys(tmp_path):
+    # keys that all want the same slot are found by probing past each other
+    states = [state for state, _ in positions(4, 5, 3, 3)]
+    entries = {}
+    for state in states:
+        key, _ = canonical_hash(state.grid, state.player)
+        entries.setdefault(key, len(entries) % 5)
+    path = tmp_path / 'book.bin'
+    write_book(path, entries, 4, 5, 3)
+    book = OpeningBook(path)
+    slots = [key & (book.n_slots - 1) for key in entries]
+    assert len(set(slots)) < len(slots)
+
+    for state in states:
+        assert book.lookup(state) == book_move(entries, state)
+
+
+def test_not_a_book(tmp_path):
+    path = tmp_path / 'book.bin'
+    path.write_bytes(bytes(64))
+    with pytest.raises(ValueError):
+        OpeningBook(path)
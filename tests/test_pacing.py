@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pygame
+
+from pacing import FramePacer
+
+
+def post_later(events, delay=0.05):
+    """Posts `events` together from another thread, `delay` seconds on."""
+    def post():
+        time.sleep(delay)
+        for event in events:
+            pygame.event.post(event)
+    thread = threading.Thread(target=post)
+    thread.start()
+    return thread
+
+
+def idle_pacer(settings):
+    """Returns a pacer that sleeps on its next tick."""
+    pacer = FramePacer(settings, pygame.time.Clock())
+    pacer.tick()
+    pacer.active_time = 0
+    return pacer
+
+
+def test_woken_events_keep_their_order(settings):
+    pacer = idle_pacer(settings)
+    click = [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(1, 1), button=1),
+             pygame.event.Event(pygame.MOUSEBUTTONUP, pos=(1, 1), button=1)]
+    thread = post_later(click)
+    pacer.tick()
+    thread.join()
+
+    types = [event.type for event in pacer.events()
+             if event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)]
+    assert types == [pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP]
+    assert pacer.events() == []
+
+
+def test_sleeps_until_an_event(settings):
+    pacer = idle_pacer(settings)
+    start = time.perf_counter()
+    pacer.tick()
+    assert time.perf_counter() - start >= settings.idle_frame_time * 0.9
+    assert pacer.active_time <= 0
+
+    # an event wakes it, and the next frames are at full rate
+    thread = post_later([pygame.event.Event(pygame.KEYDOWN, key=0)])
+    pacer.tick()
+    thread.join()
+    assert pacer.active_time > 0
+    assert pacer.events()
+
+
+def test_slept_time_is_at_most_one_tick(settings):
+    pacer = idle_pacer(settings)
+    thread = post_later([pygame.event.Event(pygame.KEYDOWN, key=0)], 0.2)
+    assert pacer.tick() <= 1 / settings.tick_rate
+    thread.join()
+
+
+def test_click_after_idle_runs_one_tick(settings, monkeypatch):
+    from game import Game
+    from music import Music
+
+    screen = pygame.display.get_surface()
+    game = Game(settings, screen, Music(settings), pygame.time.Clock())
+    game.run_frame(0)
+    assert game.is_idle()
+
+    ticks = []
+    game_tick = game.tick
+    monkeypatch.setattr(game, 'tick', lambda: (ticks.append(1), game_tick()))
+
+    # a click on a column, a while into sleeping
+    pos = (3 * settings.coin_length + settings.padding_left,
+           settings.padding_y + 1)
+    monkeypatch.setattr(pygame.mouse, 'get_pos', lambda: pos)
+    game.pacer.active_time = 0
+    thread = post_later([pygame.event.Event(
+        pygame.MOUSEBUTTONDOWN, pos=pos, button=1)], 0.2)
+    game.run_frame(game.pacer.tick(not game.is_idle()))
+    thread.join()
+
+    # the coin has started falling from the top, not been caught up by
+    # the time spent asleep
+    assert len(ticks) == 1
+    assert game.coins.is_falling()
+    coins = game.coins
+    fallen = coins.y[0] - coins.prev_y[0]
+    assert 0 < fallen < settings.coin_length / 4
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from gamestate import GameState, ROTATE_CLOCKWISE
+from record import (GameRecord, HEADER, iter_records, read_records,
+                    write_records)
+
+from random_games import random_games
+
+
+def test_round_trip(tmp_path):
+    games = list(random_games())
+    records = [GameRecord.from_game_state(game_state)
+               for game_state, _ in games]
+
+    path = tmp_path / 'games.c4r'
+    write_records(path, records, append=False)
+    data = b''.join(record.to_bytes() for record in records)
+    assert path.read_bytes() == data
+
+    read = list(read_records(path))
+    assert [record.to_bytes() for record in read] == \
+        [record.to_bytes() for record in iter_records(data)]
+
+    for (game_state, snapshots), record in zip(games, read):
+        assert record.to_bytes() == GameRecord.from_game_state(
+            game_state).to_bytes()
+        assert np.array_equal(record.grid(), game_state.grid)
+        assert record.winner() == game_state.winner
+
+        # every position on the way, from the record alone
+        for ply, before in enumerate(snapshots):
+            assert record.grid(ply).tolist() == before[0]
+
+
+def test_starting_shape_after_quarter_turns():
+    game_state = GameState(6, 7, 4)
+    for move in (3, ROTATE_CLOCKWISE, 2):
+        game_state.play(move)
+    record = GameRecord.from_game_state(game_state)
+    assert (record.n_rows, record.n_cols) == (6, 7)
+    assert np.array_equal(record.grid(), game_state.grid)
+
+    replayed = record.game_state()
+    assert np.array_equal(replayed.grid, game_state.grid)
+    assert replayed.player == game_state.player
+
+
+def test_append_and_empty_archive(tmp_path):
+    path = tmp_path / 'games.c4r'
+    path.write_bytes(b'')
+    assert list(read_records(path)) == []
+
+    first = GameRecord.from_moves(6, 7, 4, [3, 3])
+    second = GameRecord.from_moves(7, 7, 5, [1, -3])
+    write_records(path, [first])
+    write_records(path, [second])
+    assert len(path.read_bytes()) == 2 * HEADER.size + 4
+    assert [record.move_list() for record in read_records(path)] == \
+        [[3, 3], [1, -3]]
+
+
+def test_not_a_record():
+    with pytest.raises(ValueError):
+        GameRecord.unpack_from(b'XX' + bytes(HEADER.size))
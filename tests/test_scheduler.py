@@ -0,0 +1,58 @@
+from scheduler import Scheduler
+
+
+def test_actions_run_in_order_when_due():
+    scheduler = Scheduler()
+    ran = []
+    scheduler.after(0.2, ran.append, 'b')
+    scheduler.after(0.1, ran.append, 'a')
+    scheduler.after(0.2, ran.append, 'c')
+
+    scheduler.update(0.05)
+    assert ran == []
+    scheduler.update(0.1)
+    assert ran == ['a']
+    scheduler.update(0.1)
+    assert ran == ['a', 'b', 'c']
+    assert not scheduler.pending()
+
+
+def test_cancel():
+    scheduler = Scheduler()
+    ran = []
+    handle = scheduler.after(0.1, ran.append, 'a')
+    scheduler.after(0.1, ran.append, 'b')
+    scheduler.cancel(handle)
+    scheduler.cancel(None)
+    assert scheduler.pending()
+
+    scheduler.update(0.1)
+    assert ran == ['b']
+    assert not scheduler.pending()
+
+
+def test_cancelling_after_running_leaves_nothing_behind():
+    # as Game.next_turn does with the bot's wake-up on every turn
+    scheduler = Scheduler()
+    ran = []
+    for i in range(1000):
+        handle = scheduler.after(0.1, ran.append, i)
+        scheduler.update(0.1)
+        scheduler.cancel(handle)
+
+    assert len(ran) == 1000
+    assert not scheduler.waiting
+    assert not scheduler.queue
+
+
+def test_actions_can_schedule_more():
+    scheduler = Scheduler()
+    ran = []
+
+    def first():
+        ran.append('first')
+        scheduler.after(0, ran.append, 'second')
+
+    scheduler.after(0.1, first)
+    scheduler.update(0.1)
+    assert ran == ['first', 'second']
@@ -0,0 +1,51 @@
+import math
+
+from tournament import elo_difference, summarise, wilson_interval
+
+
+def result(game, winner):
+    return {"game": game, "winner": winner, "moves": [1, 1],
+            "think_time": [0.0, 0.0]}
+
+
+def test_wilson_interval():
+    low, high = wilson_interval(0.5, 100)
+    assert 0.40 < low < 0.41 and 0.59 < high < 0.60
+    assert math.isclose(low + high, 1)
+
+    # every game the same: one end is exact, the other is not
+    low, high = wilson_interval(1.0, 8)
+    assert high == 1.0 and 0.6 < low < 0.7
+    low, high = wilson_interval(0.0, 8)
+    assert low == 0.0 and 0.3 < high < 0.4
+
+    # narrower with more games
+    assert (wilson_interval(0.7, 1000)[1] - wilson_interval(0.7, 1000)[0] <
+            wilson_interval(0.7, 100)[1] - wilson_interval(0.7, 100)[0])
+
+
+def test_elo_difference():
+    assert elo_difference(0.5) == 0
+    assert elo_difference(0.0) == -math.inf
+    assert elo_difference(1.0) == math.inf
+    assert math.isclose(elo_difference(0.75), -elo_difference(0.25))
+
+
+def test_summary_of_a_clean_sweep():
+    # the first bot wins every game, moving first in even games and second
+    # in odd ones
+    results = [result(game, game % 2) for game in range(8)]
+    summary = summarise(results, 1.0)
+    assert (summary["wins"], summary["draws"], summary["losses"]) == \
+        (8, 0, 0)
+    assert summary["elo"] == summary["elo_high"] == math.inf
+    assert 100 < summary["elo_low"] < 200
+
+
+def test_summary_with_draws():
+    results = [result(0, 0), result(1, None), result(2, 1), result(3, None)]
+    summary = summarise(results, 1.0)
+    assert (summary["wins"], summary["draws"], summary["losses"]) == \
+        (1, 2, 1)
+    assert summary["score"] == 0.5
+    assert summary["elo_low"] < 0 < summary["elo_high"]
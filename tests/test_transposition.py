@@ -0,0 +1,68 @@
+import numpy as np
+
+from evaluate import evaluate_boards
+from gamestate import GameState, ROTATIONS
+from transposition import (EXACT, TranspositionTable, canonical_hash,
+                           mirror_move)
+
+from random_games import random_games
+
+
+def test_mirror_images_score_the_same():
+    # the table shares an entry between a board and its mirror image,
+    # which is only right if they score the same
+    for game_state, snapshots in random_games():
+        # positions the same shape as the last one, so they can be stacked
+        grids = np.array([before[0] for before in snapshots
+                          if before[3:5] == (game_state.n_rows,
+                                             game_state.n_cols)])
+        if not len(grids):
+            continue
+        for player in (1, 2):
+            _, scores = evaluate_boards(grids, game_state.connect_num, player)
+            _, mirror_scores = evaluate_boards(
+                grids[:, :, ::-1], game_state.connect_num, player)
+            assert np.array_equal(scores, mirror_scores)
+
+
+def test_mirror_images_share_a_key():
+    for game_state, _ in random_games(50):
+        grid = game_state.grid
+        key, mirrored = canonical_hash(grid, 1)
+        mirror_key, mirror_mirrored = canonical_hash(grid[:, ::-1], 1)
+        assert key == mirror_key
+        if not np.array_equal(grid, grid[:, ::-1]):
+            assert mirrored != mirror_mirrored
+        assert canonical_hash(grid, 2)[0] != key
+
+
+def test_mirror_move_plays_the_mirrored_move():
+    game_state = GameState(6, 7, 4)
+    for move in (0, 1, 1, 5):
+        game_state.play(move)
+    mirror = GameState(6, 7, 4)
+    for move in (0, 1, 1, 5):
+        mirror.play(mirror_move(move, 7))
+    assert np.array_equal(mirror.grid, game_state.grid[:, ::-1])
+
+    for move in list(range(7)) + list(ROTATIONS):
+        played = game_state.copy()
+        played.play(move)
+        mirrored = mirror.copy()
+        mirrored.play(mirror_move(move, 7))
+        assert np.array_equal(mirrored.grid, played.grid[:, ::-1])
+
+
+def test_table_keeps_deeper_results():
+    table = TranspositionTable(max_bytes=1)
+    table.store(5, 3, 1.0, EXACT, 2)
+    assert table.probe(5) == (3, 1.0, EXACT, 2)
+
+    # one slot: a shallower result for another key doesn't replace it,
+    # unless the stored one is from an older search
+    table.store(6, 2, 0.0, EXACT, 1)
+    assert table.probe(6) is None
+    table.new_search()
+    table.store(6, 2, 0.0, EXACT, 1)
+    assert table.probe(6) == (2, 0.0, EXACT, 1)
+    assert table.probe(5) is None
@@ -0,0 +1,280 @@
+"""
+Self-play tournament: plays two bots against each other many times, in
+parallel, and reports how they did. For example:
+
+    python tournament.py ai_hard ai_easy --games 1000
+
+Bots take turns to move first. Each game gets its own seed, so a run can be
+repeated exactly if no bot has a time limit: 'ai_hard' and 'mcts' think for
+as long as they do in the game (settings.ai_time_limit) unless given
+--time-limit 0, which makes them search as deep as they are set to, however
+long that takes. With --record, the
+moves of every game are saved to an archive of game records (see record.py),
+in game number order.
+"""
+import argparse
+import contextlib
+import math
+import multiprocessing
+import random
+import time
+
+from ai import NegamaxBot, RandomBot
+from gamestate import GameState
+from mcts import MCTSBot
+from opening_book import load_book
+from record import GameRecord
+from settings import Settings
+from transposition import TranspositionTable
+
+BOT_NAMES = ['ai_easy', 'ai_hard', 'mcts']
+
+# z value of a 95% confidence interval
+Z_95 = 1.96
+
+
+def make_bot(name, seed, options):
+    """
+    Returns a new bot called `name` (one of `BOT_NAMES`), seeded with
+    `seed`. `options` is a dictionary of the command line options.
+    """
+    settings = Settings()
+    if name == 'ai_easy':
+        return RandomBot(seed)
+    elif name == 'ai_hard':
+        return NegamaxBot(options['depth'], options['node_budget'],
+                          TranspositionTable(settings.ai_table_bytes),
+                          options['time_limit'],
+                          load_book(settings.opening_book_path))
+    elif name == 'mcts':
+        return MCTSBot(options['playouts'], options['time_limit'], seed=seed)
+    raise ValueError(f"unknown bot '{name}'")
+
+
+def play_game(job):
+    """
+    Plays one game, in a worker process or not. `job` is a tuple of the
+    game number, the names of the bots moving first and second, the seed
+    and the options. Returns a dictionary with the winner (0 for the first
+    bot, 1 for the second, None for a draw), the number of moves, and the
+    total time each bot spent thinking, and the game's record as bytes if
+    the options have a record path.
+    """
+    game_number, names, seed, options = job
+    rng = random.Random(seed)
+    bots = [make_bot(name, rng.getrandbits(32), options) for name in names]
+
+    state = GameState(options['rows'], options['cols'], options['connect'])
+    think_time = [0.0, 0.0]
+    moves = [0, 0]
+
+    # random opening moves, so that deterministic bots don't play the same
+    # game every time
+    for _ in range(options['random_moves']):
+        if state.is_over():
+            break
+        state.play(rng.choice(state.legal_moves()))
+
+    for _ in range(options['max_moves']):
+        if state.is_over():
+            break
+        side = state.player - 1
+        start = time.perf_counter()
+        move = bots[side].best_move(state)
+        think_time[side] += time.perf_counter() - start
+        moves[side] += 1
+        state.play(move)
+
+    for bot in bots:
+        if hasattr(bot, 'close'):
+            bot.close()
+
+    winner = None if state.winner is None else state.winner - 1
+    result = {
+        "game": game_number,
+        "winner": winner,
+        "moves": moves,
+        "think_time": think_time
+    }
+    if options['record_path']:
+        result["record"] = GameRecord.from_game_state(state).to_bytes()
+    return result
+
+
+def elo_difference(score):
+    """
+    Returns the Elo difference that gives an expected `score` (0 to 1),
+    which is infinite for a score of 0 or 1.
+    """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def wilson_interval(score, n_games, z=Z_95):
+    """
+    Returns the (low, high) Wilson score interval of the score over
+    `n_games` games. Unlike the normal approximation, it doesn't shrink to
+    nothing when every game has the same result. Draws make the scores
+    vary less than wins and losses alone would, so it errs on the wide side.
+    """
+    if n_games == 0:
+        return 0.0, 1.0
+    z2 = z * z
+    centre = (score + z2 / (2 * n_games)) / (1 + z2 / n_games)
+    margin = (z / (1 + z2 / n_games) *
+              math.sqrt(score * (1 - score) / n_games +
+                        z2 / (4 * n_games * n_games)))
+
+    # keep the ends exact at 0% and 100%, so their Elo is unbounded
+    low = 0.0 if score <= 0 else max(0.0, centre - margin)
+    high = 1.0 if score >= 1 else min(1.0, centre + margin)
+    return low, high
+
+
+def summarise(results, elapsed):
+    """
+    Returns a dictionary of statistics for the games in `results`, which
+    took `elapsed` seconds to play, from the point of view of the bot that
+    moved first in game 0.
+    """
+    n_games = len(results)
+    wins = draws = losses = 0
+    think_time = [0.0, 0.0]
+    moves = [0, 0]
+    total_score = 0.0
+
+    for result in results:
+        # the bots swap sides every game: work out which one won
+        first = result["game"] % 2
+        if result["winner"] is None:
+            draws += 1
+            total_score += 0.5
+        elif (result["winner"] == 0) == (first == 0):
+            wins += 1
+            total_score += 1.0
+        else:
+            losses += 1
+
+        for side in range(2):
+            bot = (side + first) % 2
+            think_time[bot] += result["think_time"][side]
+            moves[bot] += result["moves"][side]
+
+    mean = total_score / n_games
+    low, high = wilson_interval(mean, n_games)
+
+    return {
+        "games": n_games,
+        "wins": wins,
+        "draws": draws,
+        "losses": losses,
+        "score": mean,
+        "elo": elo_difference(mean),
+        "elo_low": elo_difference(low),
+        "elo_high": elo_difference(high),
+        "latency_ms": [1000 * think_time[bot] / max(1, moves[bot])
+                       for bot in range(2)],
+        "games_per_second": n_games / elapsed
+    }
+
+
+def run_tournament(names, n_games, options, processes=None, seed=0,
+                   log=print):
+    """
+    Plays `n_games` games between the two bots in `names` across a pool of
+    `processes` processes (None for one per core). Returns the results of
+    `summarise`.
+    """
+    rng = random.Random(seed)
+    jobs = []
+    for game_number in range(n_games):
+        order = names if game_number % 2 == 0 else names[::-1]
+        jobs.append((game_number, order, rng.getrandbits(32), options))
+
+    start = time.perf_counter()
+    results = []
+
+    # games finish in any order; records are held back until every game
+    # before them is written, so the archive is in game number order
+    record_path = options['record_path']
+    waiting = {}
+    next_game = 0
+    with (open(record_path, 'ab') if record_path
+          else contextlib.nullcontext()) as record_file, \
+            multiprocessing.Pool(processes) as pool:
+        for result in pool.imap_unordered(play_game, jobs, chunksize=4):
+            if record_file is not None:
+                waiting[result["game"]] = result.pop("record")
+                while next_game in waiting:
+                    record_file.write(waiting.pop(next_game))
+                    next_game += 1
+            results.append(result)
+            if len(results) % 100 == 0:
+                log(f"{len(results)}/{n_games} games played")
+
+    return summarise(results, time.perf_counter() - start)
+
+
+def main():
+    """Runs a tournament from the command line, and prints the results."""
+    settings = Settings()
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('bots', nargs=2, choices=BOT_NAMES)
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--processes', type=int, default=None,
+                        help="worker processes, default one per core")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rows', type=int, default=settings.n_rows)
+    parser.add_argument('--cols', type=int, default=settings.n_cols)
+    parser.add_argument('--connect', type=int, default=settings.connect_num)
+    parser.add_argument('--random-moves', type=int, default=2,
+                        help="random moves played at the start of each game")
+    parser.add_argument('--max-moves', type=int, default=None,
+                        help="moves before a game is a draw, "
+                             "default twice the number of cells")
+    parser.add_argument('--depth', type=int, default=settings.ai_depth)
+    parser.add_argument('--node-budget', type=int,
+                        default=settings.ai_node_budget)
+    parser.add_argument('--time-limit', type=float,
+                        default=settings.ai_time_limit,
+                        help="seconds per move for 'ai_hard' and 'mcts', "
+                             "0 for no limit")
+    parser.add_argument('--playouts', type=int, default=1000)
+    parser.add_argument('--record', default=None, metavar='PATH',
+                        help="add the moves of every game to this archive")
+    args = parser.parse_args()
+
+    options = {
+        "rows": args.rows,
+        "cols": args.cols,
+        "connect": args.connect,
+        "random_moves": args.random_moves,
+        "max_moves": args.max_moves or 2 * args.rows * args.cols,
+        "depth": args.depth,
+        "node_budget": args.node_budget,
+        "time_limit": args.time_limit or None,
+        "playouts": args.playouts,
+        "record_path": args.record
+    }
+
+    summary = run_tournament(args.bots, args.games, options,
+                             args.processes, args.seed)
+
+    first, second = args.bots
+    print(f"{first} vs {second}, {summary['games']} games")
+    print(f"  {first} won {summary['wins']}, drew {summary['draws']}, "
+          f"lost {summary['losses']} (score {summary['score']:.3f})")
+    print(f"  Elo difference: {summary['elo']:+.0f} "
+          f"(95% CI {summary['elo_low']:+.0f} to {summary['elo_high']:+.0f})")
+    print(f"  average move time: {first} {summary['latency_ms'][0]:.2f} ms, "
+          f"{second} {summary['latency_ms'][1]:.2f} ms")
+    print(f"  {summary['games_per_second']:.1f} games per second")
+
+
+# only run main() if this python module is the one being run
+if __name__ == "__main__":
+    main()
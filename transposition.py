@@ -0,0 +1,163 @@
+import numpy as np
+
+from gamestate import ROTATE_CLOCKWISE, ROTATE_ANTICLOCKWISE
+
+# Zobrist keys are made from a fixed seed, so hashes are the same in every
+# process and every run
+ZOBRIST_SEED = 257
+
+# what a stored score means: the exact score, or a bound on it from a search
+# that was cut off by alpha-beta pruning
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# rough size of one table entry, in bytes: a list slot plus a tuple of
+# six small Python objects
+ENTRY_BYTES = 160
+
+# Zobrist keys for every board shape used so far, keyed by (n_rows, n_cols)
+_zobrist_keys = {}
+
+
+def zobrist_keys(n_rows, n_cols):
+    """
+    Returns a tuple (keys, to_move) of random Zobrist keys for an `n_rows`
+    x `n_cols` board: `keys` is a (3, n_rows, n_cols) uint64 array with a
+    key per cell per player, all zero for player 0 (empty), and
+    `to_move[player]` is the key for `player` being the one to move. Even
+    the empty board has a non-zero hash, so 0 can mean "no position".
+    """
+    shape = (n_rows, n_cols)
+    if shape not in _zobrist_keys:
+        rng = np.random.RandomState([ZOBRIST_SEED, n_rows, n_cols])
+        keys = rng.randint(0, 2 ** 64, size=(3, n_rows, n_cols),
+                           dtype=np.uint64)
+        keys[0] = 0
+        to_move = [0] + [int(key) for key in rng.randint(
+            1, 2 ** 64, size=2, dtype=np.uint64)]
+        _zobrist_keys[shape] = (keys, to_move)
+    return _zobrist_keys[shape]
+
+
+def zobrist_hash(grid, player):
+    """Returns the Zobrist hash of `grid` with `player` to move."""
+    n_rows, n_cols = grid.shape
+    keys, to_move = zobrist_keys(n_rows, n_cols)
+    rows, cols = np.indices(grid.shape)
+    key = int(np.bitwise_xor.reduce(keys[grid, rows, cols], axis=None))
+    return key ^ to_move[player]
+
+
+def canonical_hash(grid, player):
+    """
+    Returns a tuple (key, mirrored): the smaller of the Zobrist hashes of
+    `grid` and of `grid` mirrored left to right, and whether it was the
+    mirrored one. A position and its mirror image have the same value, so
+    they can share a table entry.
+
+    Rotated positions aren't equivalent: the coins fall differently once
+    the board is turned, so only the mirror image is folded in.
+    """
+    key = zobrist_hash(grid, player)
+    mirror_key = zobrist_hash(grid[:, ::-1], player)
+    if mirror_key < key:
+        return mirror_key, True
+    return key, False
+
+
+def mirror_move(move, n_cols):
+    """
+    Returns the move that does to a mirrored board what `move` does to the
+    board: the column on the other side, or the rotation the other way.
+    """
+    if move is None:
+        return None
+    if move == ROTATE_CLOCKWISE:
+        return ROTATE_ANTICLOCKWISE
+    if move == ROTATE_ANTICLOCKWISE:
+        return ROTATE_CLOCKWISE
+    if move >= 0:
+        return n_cols - 1 - move
+    return move
+
+
+class TranspositionTable:
+    """
+    Fixed size table of search results, keyed by canonical Zobrist hash.
+
+    Each key maps to one slot. A new result replaces the one in its slot if
+    it comes from a newer search, or from an equally deep or deeper
+    search, so deep results from the current search are kept longest.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        """Initialise an empty table taking up about `max_bytes` of memory."""
+        self.size = max(1, max_bytes // ENTRY_BYTES)
+
+        # each slot is None or (key, depth, score, flag, move, generation)
+        self.slots = [None] * self.size
+
+        # bumped for every new search, so entries from old ones get replaced
+        self.generation = 0
+
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        """Mark the entries stored so far as being from an older search."""
+        self.generation += 1
+
+    def clear(self):
+        """Remove every entry and reset the statistics."""
+        self.slots = [None] * self.size
+        self.probes = self.hits = self.stores = self.overwrites = 0
+
+    def probe(self, key):
+        """
+        Returns the (depth, score, flag, move) stored for `key`, or None if
+        there is nothing stored for it.
+        """
+        self.probes += 1
+        entry = self.slots[key % self.size]
+        if entry is None or entry[0] != key:
+            return None
+        self.hits += 1
+        return entry[1:5]
+
+    def store(self, key, depth, score, flag, move):
+        """
+        Stores the result of searching the position with hash `key` `depth`
+        moves ahead, if the replacement policy allows it.
+        """
+        index = key % self.size
+        entry = self.slots[index]
+        if entry is not None:
+            if (entry[5] == self.generation and entry[1] > depth and
+                    entry[0] != key):
+                return
+            if entry[0] != key:
+                self.overwrites += 1
+        self.slots[index] = (key, depth, score, flag, move, self.generation)
+        self.stores += 1
+
+    def hit_rate(self):
+        """Returns the fraction of probes that found an entry."""
+        if not self.probes:
+            return 0.0
+        return self.hits / self.probes
+
+    def stats(self):
+        """Returns a dictionary of statistics for sizing the table."""
+        used = sum(entry is not None for entry in self.slots)
+        return {
+            "size": self.size,
+            "used": used,
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate(),
+            "stores": self.stores,
+            "overwrites": self.overwrites
+        }